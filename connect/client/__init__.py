@@ -7,3 +7,6 @@ from connect.client.exceptions import ClientError  # noqa
 from connect.client.fluent import AsyncConnectClient, ConnectClient  # noqa
 from connect.client.rql import R  # noqa
 from connect.client.logger import RequestLogger # noqa
+from connect.client.ratelimit import RateLimiter  # noqa
+from connect.client.retry import RetryPolicy  # noqa
+from connect.client.speccache import SpecsCache  # noqa
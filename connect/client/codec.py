@@ -0,0 +1,78 @@
+#
+# This file is part of the Ingram Micro CloudBlue Connect Python OpenAPI Client.
+#
+# Copyright (c) 2021 Ingram Micro. All Rights Reserved.
+#
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JSONCodec:
+    """
+    Encode and decode JSON bodies using the python standard library.
+
+    Custom codecs must provide the same ``dumps`` and ``loads`` methods.
+    """
+    def dumps(self, obj):
+        """
+        Serialize ``obj`` to a JSON document.
+
+        :param obj: The object to serialize.
+        :return: The UTF-8 encoded JSON document.
+        :rtype: bytes
+        """
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        """
+        Deserialize a JSON document.
+
+        :param data: The JSON document.
+        :type data: bytes, str
+        :raises JSONDecodeError: If ``data`` isn't a valid JSON document.
+        :return: The deserialized object.
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Encode and decode JSON bodies using `orjson <https://github.com/ijl/orjson>`_.
+
+    Dictionary keys that are not strings are serialized like the standard library does,
+    but integers are limited to 64 bits: encoding a larger integer raises ``TypeError``
+    and decoding it returns a float.
+    """
+    def __init__(self):
+        """
+        Create a new OrjsonCodec.
+
+        :raises ImportError: If ``orjson`` is not installed.
+        """
+        if orjson is None:
+            raise ImportError(
+                'OrjsonCodec requires orjson, install it with '
+                '`pip install connect-openapi-client[orjson]`.',
+            )
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def get_default_codec():
+    """
+    Returns the JSON codec used when the client is not given one.
+    OrjsonCodec is faster but it is opt-in since it doesn't support integers
+    larger than 64 bits.
+
+    :return: A JSONCodec.
+    :rtype: JSONCodec
+    """
+    return JSONCodec()
@@ -3,15 +3,20 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
+import asyncio
 import threading
-from json.decoder import JSONDecodeError
 
+import httpx
+
+from connect.client.codec import get_default_codec
 from connect.client.constants import CONNECT_ENDPOINT_URL, CONNECT_SPECS_URL
+from connect.client.exceptions import ClientError
 from connect.client.mixins import AsyncClientMixin, SyncClientMixin
 from connect.client.models import AsyncCollection, AsyncNS, Collection, NS
 from connect.client.utils import get_headers
 from connect.client.help_formatter import DefaultFormatter
-from connect.client.openapi import OpenAPISpecs
+from connect.client.openapi import specs_registry
+from connect.client.retry import RetryPolicy
 
 
 class _ConnectClientBase(threading.local):
@@ -31,6 +36,15 @@ class _ConnectClientBase(threading.local):
         max_retries=0,
         logger=None,
         timeout=(180.0, 180.0),
+        retry_policy=None,
+        rate_limiter=None,
+        json_codec=None,
+        specs_cache=None,
+        specs_loading='eager',
+        wait_for_specs=True,
+        lean_specs=False,
+        validate_payloads=False,
+        validate_responses=False,
     ):
         """
         Create a new instance of the ConnectClient.
@@ -46,25 +60,102 @@ class _ConnectClientBase(threading.local):
         :type default_headers: dict, optional
         :param logger: HTTPP Request logger class, defaults to None
         :type logger: RequestLogger, optional
+        :param max_retries: Maximum number of retries of a failed call, defaults to 0
+        :type max_retries: int, optional
+        :param retry_policy: Customize when and how failed calls are retried,
+                             defaults to a RetryPolicy built using ``max_retries``
+        :type retry_policy: RetryPolicy, optional
+        :param rate_limiter: Throttle the calls issued by this client, the same instance
+                             can be shared by many clients, defaults to None
+        :type rate_limiter: RateLimiter, optional
+        :param json_codec: Codec used to encode request payloads and decode responses,
+                           defaults to JSONCodec, pass an OrjsonCodec to use ``orjson``
+        :type json_codec: JSONCodec, optional
+        :param specs_cache: Store the specifications downloaded from ``specs_location``
+                            on disk, defaults to None
+        :type specs_cache: SpecsCache, optional
+        :param specs_loading: When the specifications are loaded, either ``eager``
+                              (while creating the client), ``lazy`` (the first time they are
+                              needed) or ``background`` (in a background thread started
+                              while creating the client), defaults to ``eager``
+        :type specs_loading: str, optional
+        :param wait_for_specs: Wait for the specifications to be loaded before validating
+                               a call, if False calls are not validated until the
+                               specifications are available, defaults to True
+        :type wait_for_specs: bool, optional
+        :param lean_specs: Keep in memory only the parts of the specifications needed to
+                           route calls, the descriptions used by ``help`` are loaded the
+                           first time they are needed, it cannot be combined with
+                           ``validate_payloads`` or ``validate_responses``, defaults to False
+        :type lean_specs: bool, optional
+        :param validate_payloads: Validate JSON payloads against the request body schemas of
+                                  the specifications before sending them, defaults to False
+        :type validate_payloads: bool, optional
+        :param validate_responses: Validate JSON responses against the response schemas of
+                                   the specifications, items streamed by ``get_items`` are
+                                   not validated, defaults to False
+        :type validate_responses: bool, optional
         """
         if default_headers and 'Authorization' in default_headers:
             raise ValueError('`default_headers` cannot contains `Authorization`')
 
+        if specs_loading not in ('eager', 'lazy', 'background'):
+            raise ValueError('`specs_loading` must be one of `eager`, `lazy` or `background`.')
+
+        if lean_specs and (validate_payloads or validate_responses):
+            raise ValueError(
+                '`lean_specs` cannot be combined with `validate_payloads` or `validate_responses`.',
+            )
+
         self.endpoint = endpoint or CONNECT_ENDPOINT_URL
         self.api_key = api_key
         self.default_headers = default_headers or {}
         self.default_limit = default_limit
         self.max_retries = max_retries
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries)
+        self.rate_limiter = rate_limiter
+        self.json_codec = json_codec or get_default_codec()
         self._use_specs = use_specs
         self._validate_using_specs = validate_using_specs
+        self._validate_payloads = validate_payloads
+        self._validate_responses = validate_responses
         self.specs_location = specs_location or CONNECT_SPECS_URL
-        self.specs = None
+        self.specs_cache = specs_cache
+        self._wait_for_specs = wait_for_specs
+        self._lean_specs = lean_specs
+        self._specs = None
+        self._specs_future = None
+        self._help_formatter = DefaultFormatter(None)
         if self._use_specs:
-            self.specs = OpenAPISpecs(self.specs_location)
+            if specs_loading == 'eager':
+                self._load_specs()
+            elif specs_loading == 'background':
+                self._submit_specs()
         self.response = None
         self.logger = logger
-        self._help_formatter = DefaultFormatter(self.specs)
         self.timeout = timeout
+        self._session = None
+
+    @property
+    def specs(self):
+        """
+        Returns the OpenAPI specifications, loading them if needed.
+
+        :return: The OpenAPI specifications or None if ``use_specs`` is False.
+        :rtype: OpenAPISpecs
+        """
+        self._load_specs()
+        return self._specs
+
+    @specs.setter
+    def specs(self, specs):
+        """
+        Set the OpenAPI specifications used by this client.
+
+        :param specs: The OpenAPI specifications.
+        :type specs: OpenAPISpecs
+        """
+        self._set_specs(specs)
 
     def __getattr__(self, name):
         """
@@ -121,12 +212,75 @@ class _ConnectClientBase(threading.local):
 
     def print_help(self, obj):
         print()
-        print(self._help_formatter.format(obj))
+        print(self._get_help_formatter().format(obj))
 
     def help(self):
         self.print_help(None)
         return self
 
+    def refresh_specs(self):
+        """
+        Reload the OpenAPI specifications from ``specs_location``.
+        The reloaded specifications are shared with the clients created afterwards.
+        """
+        if not self._use_specs:
+            return
+        self._set_specs(specs_registry.refresh(self.specs_location, **self._get_specs_kwargs()))
+
+    def _get_help_formatter(self):
+        self._load_specs()
+        return self._help_formatter
+
+    def _load_specs(self):
+        if self._specs is not None or not self._use_specs:
+            return
+        if self._specs_future is not None:
+            self._set_specs(self._specs_future.result())
+        else:
+            self._set_specs(specs_registry.get(self.specs_location, **self._get_specs_kwargs()))
+
+    def _set_specs(self, specs):
+        self._specs = specs
+        self._specs_future = None
+        self._help_formatter = DefaultFormatter(specs)
+
+    def _get_specs_kwargs(self):
+        return {'cache': self.specs_cache, 'lean': self._lean_specs}
+
+    def _submit_specs(self):
+        self._specs_future = specs_registry.submit(self.specs_location, **self._get_specs_kwargs())
+
+    def _get_validation_specs(self):
+        if not (self._use_specs and self._validate_using_specs):
+            return None
+        if self._specs is None and not self._wait_for_specs:
+            if self._specs_future is None:
+                self._submit_specs()
+            if not self._specs_future.done():
+                return None
+        return self.specs
+
+    def _validate_payload(self, specs, method, path, kwargs):
+        if not (specs and self._validate_payloads) or kwargs.get('json') is None:
+            return
+        errors = specs.validate_request(method, path, kwargs['json'])
+        if errors:
+            raise ClientError(
+                f'Invalid payload for `{method.upper()} {path}`: {"; ".join(errors)}',
+                errors=errors,
+            )
+
+    def _validate_response(self, specs, method, path, response, result):
+        if not (specs and self._validate_responses) or not isinstance(result, (dict, list)):
+            return
+        errors = specs.validate_response(method, path, response.status_code, result)
+        if errors:
+            raise ClientError(
+                f'Invalid response for `{method.upper()} {path}`: {"; ".join(errors)}',
+                status_code=response.status_code,
+                errors=errors,
+            )
+
     def _get_collection_class(self):
         raise NotImplementedError()
 
@@ -145,17 +299,46 @@ class _ConnectClientBase(threading.local):
             kwargs['headers'].update(self.default_headers)
         return kwargs
 
-    def _get_api_error_details(self):
-        if self.response is not None:
+    def _encode_json_payload(self, kwargs, body_kwarg):
+        if kwargs.get('json') is None:
+            return kwargs
+        kwargs = dict(kwargs)
+        kwargs[body_kwarg] = self.json_codec.dumps(kwargs.pop('json'))
+        kwargs['headers'] = {'Content-Type': 'application/json', **kwargs['headers']}
+        return kwargs
+
+    def _get_api_error_details(self, response):
+        if response is not None:
             try:
-                error = self.response.json()
+                error = self.json_codec.loads(response.content)
                 if 'error_code' in error and 'errors' in error:
                     return error
-            except JSONDecodeError:
+            except ValueError:
                 pass
 
 
 class ConnectClient(_ConnectClientBase, SyncClientMixin):
+    def __init__(self, *args, pool_maxsize=10, **kwargs):
+        """
+        Create a new instance of the ConnectClient.
+
+        Http calls are issued through a ``requests.Session`` that keeps
+        connections alive between calls. The client can be used as a context
+        manager to release the pooled connections on exit.
+
+        Prefetched pages, ``fetch_parallel`` and ``filter_in_batches`` issue their
+        calls through a pool of ``pool_maxsize`` threads owned by the client
+        that share its http session.
+
+        :param pool_maxsize: Maximum number of connections to keep in the pool
+                             for each host and number of threads used to issue
+                             concurrent calls, defaults to 10
+        :type pool_maxsize: int, optional
+        """
+        super().__init__(*args, **kwargs)
+        self.pool_maxsize = pool_maxsize
+        self._executor = None
+
     def _get_collection_class(self):
         return Collection
 
@@ -164,6 +347,47 @@ class ConnectClient(_ConnectClientBase, SyncClientMixin):
 
 
 class AsyncConnectClient(_ConnectClientBase, AsyncClientMixin):
+    def __init__(self, *args, limits=None, http2=False, **kwargs):
+        """
+        Create a new instance of the AsyncConnectClient.
+
+        Http calls are issued through a single ``httpx.AsyncClient`` that is
+        kept for the whole lifetime of the client so that concurrent calls
+        share the same pool of connections. The client can be used as an
+        asynchronous context manager to release the pooled connections on exit.
+
+        :param limits: Connection pool limits, defaults to 100 connections
+                       with at most 20 keep-alive connections
+        :type limits: httpx.Limits, optional
+        :param http2: Enable HTTP/2 support (requires the ``h2`` package), defaults to False
+        :type http2: bool, optional
+        """
+        super().__init__(*args, **kwargs)
+        self.limits = limits or httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        self.http2 = http2
+
+    async def load_specs(self):
+        """
+        Load the OpenAPI specifications without blocking the running event loop.
+        Use it together with ``specs_loading='lazy'`` to create clients
+        within a running event loop.
+
+        :return: The OpenAPI specifications or None if ``use_specs`` is False.
+        :rtype: OpenAPISpecs
+        """
+        if self._specs is None and self._use_specs:
+            if self._specs_future is not None:
+                specs = await asyncio.wrap_future(self._specs_future)
+            else:
+                specs = await specs_registry.aget(self.specs_location, **self._get_specs_kwargs())
+            self._set_specs(specs)
+        return self._specs
+
+    async def _get_validation_specs(self):
+        if self._use_specs and self._validate_using_specs and self._wait_for_specs:
+            await self.load_specs()
+        return super()._get_validation_specs()
+
     def _get_collection_class(self):
         return AsyncCollection
 
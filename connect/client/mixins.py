@@ -3,21 +3,97 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlencode
 
 import httpx
 
 import requests
 
-from httpx import HTTPError
+from httpx import HTTPError, HTTPStatusError
 
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 from connect.client.exceptions import ClientError
+from connect.client.utils import iter_json_array
 
 
 class SyncClientMixin:
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def session(self):
+        """
+        Returns the pooled ``requests.Session`` used by this client,
+        creating it on first access.
+
+        :return: The http session.
+        :rtype: requests.Session
+        """
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    @property
+    def executor(self):
+        """
+        Returns the pool of threads used by this client to issue calls
+        concurrently, creating it on first access.
+        The pool has ``pool_maxsize`` threads, as many as the pooled connections.
+
+        :return: The thread pool.
+        :rtype: concurrent.futures.ThreadPoolExecutor
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_maxsize,
+                thread_name_prefix='connect-client',
+            )
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule ``fn(*args, **kwargs)`` to be run by the thread pool of this client.
+
+        The client keeps a separate state for each thread, so before running
+        ``fn`` the worker thread takes the state of the calling thread:
+        calls issued by ``fn`` through this client share the http session,
+        the logger and the rest of the configuration of the calling thread.
+
+        :param fn: The callable to run.
+        :type fn: Callable
+        :return: A future representing the result of ``fn``.
+        :rtype: concurrent.futures.Future
+        """
+        state = dict(self.__dict__, _session=self.session, _executor=self.executor)
+        return self._executor.submit(self._run_with_state, state, fn, args, kwargs)
+
+    def close(self):
+        """
+        Close the underlying http session releasing all the pooled connections
+        and shut down the thread pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _run_with_state(self, state, fn, args, kwargs):
+        self.__dict__.update(state)
+        self.response = None
+        return fn(*args, **kwargs)
+
     def get(self, url, **kwargs):
         return self.execute('get', url, **kwargs)
 
@@ -41,13 +117,39 @@ class SyncClientMixin:
         return self.execute('delete', url, **kwargs)
 
     def execute(self, method, path, **kwargs):
-        if (
-            self._use_specs
-            and self._validate_using_specs
-            and not self.specs.exists(method, path)
-        ):
+        result = self._execute(method, path, kwargs, self._decode_response)
+        self._validate_response(self._get_validation_specs(), method, path, self.response, result)
+        return result
+
+    def get_items(self, url, chunk_size=65536, **kwargs):
+        """
+        Execute a http GET on a list endpoint and returns an iterator
+        over the items of the returned JSON array.
+        Items are decoded one at a time while the response body is received
+        so the whole page is never held in memory. Since the whole response
+        is never available, items are not validated against the specifications
+        even if ``validate_responses`` is enabled.
+
+        :param chunk_size: number of bytes to read from the response at once,
+                           defaults to 65536.
+        :type chunk_size: int, optional
+        :return: An iterator over the returned items.
+        :rtype: Iterator[dict]
+        """
+        kwargs['stream'] = True
+        return self._execute(
+            'get',
+            url,
+            kwargs,
+            partial(self._iter_response_items, chunk_size=chunk_size),
+        )
+
+    def _execute(self, method, path, kwargs, decode):
+        specs = self._get_validation_specs()
+        if specs and not specs.exists(method, path):
             # TODO more info, specs version, method etc
             raise ClientError(f'The path `{path}` does not exist.')
+        self._validate_payload(specs, method, path, kwargs)
 
         url = f'{self.endpoint}/{path}'
 
@@ -57,44 +159,110 @@ class SyncClientMixin:
 
         try:
             self._execute_http_call(method, url, kwargs)
-
-            if self.response.status_code == 204:
-                return None
-            if self.response.headers['Content-Type'] == 'application/json':
-                return self.response.json()
-            else:
-                return self.response.content
-
+            return decode(self.response)
         except RequestException as re:
-            api_error = self._get_api_error_details() or {}
+            api_error = self._get_api_error_details(self.response) or {}
             status_code = self.response.status_code if self.response is not None else None
             raise ClientError(status_code=status_code, **api_error) from re
 
+    def _decode_response(self, response):
+        if response.status_code == 204:
+            return None
+        if response.headers['Content-Type'] == 'application/json':
+            return self.json_codec.loads(response.content)
+        else:
+            return response.content
+
+    def _iter_response_items(self, response, chunk_size):
+        try:
+            if response.status_code == 204:
+                return
+            yield from iter_json_array(
+                response.iter_content(chunk_size),
+                encoding=response.encoding or 'utf-8',
+            )
+        except RequestException as re:
+            raise ClientError(status_code=response.status_code) from re
+        finally:
+            response.close()
+
     def _execute_http_call(self, method, url, kwargs):
-        retry_count = 0
+        request_kwargs = self._encode_json_payload(kwargs, 'data')
+        retry = self.retry_policy.start(method)
         while True:
-            if self.logger:
-                self.logger.log_request(method, url, kwargs)
-
-            self.response = requests.request(method, url, **kwargs)
-
-            if self.logger:
-                self.logger.log_response(self.response)
-
-            if (  # pragma: no branch
-                self.response.status_code >= 500
-                and retry_count < self.max_retries
-            ):
-                retry_count += 1
-                time.sleep(1)
-                continue
-            break  # pragma: no cover
+            self._wait_for_rate_limiter()
+            delay = self._send_request(method, url, kwargs, request_kwargs, retry)
+            if delay is None:
+                break
+            if self.response is not None:
+                # release the connection of a (streamed) response that won't be read
+                self.response.close()
+            time.sleep(delay)
         if self.response.status_code >= 400:
             self.response.raise_for_status()
 
+    def _wait_for_rate_limiter(self):
+        if self.rate_limiter:
+            wait = self.rate_limiter.reserve()
+            if wait:
+                time.sleep(wait)
+
+    def _send_request(self, method, url, kwargs, request_kwargs, retry):
+        # Returns the number of seconds to wait before retrying
+        # or None if the call must not be retried.
+        if self.logger:
+            self.logger.log_request(method, url, kwargs)
+
+        try:
+            self.response = self.session.request(method, url, **request_kwargs)
+        except RequestException as e:
+            delay = retry.next_delay(exception=e)
+            if delay is None:
+                raise
+            return delay
+
+        if self.logger:
+            self.logger.log_response(self.response)
+
+        return retry.next_delay(response=self.response)
+
+    def _create_session(self):
+        adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
 
 class AsyncClientMixin:
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    @property
+    def session(self):
+        """
+        Returns the ``httpx.AsyncClient`` used by this client,
+        creating it on first access.
+
+        :return: The http client.
+        :rtype: httpx.AsyncClient
+        """
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    async def aclose(self):
+        """
+        Close the underlying http client releasing all the pooled connections.
+        """
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
     async def get(self, url, **kwargs):
         return await self.execute('get', url, **kwargs)
 
@@ -118,53 +286,78 @@ class AsyncClientMixin:
         return await self.execute('delete', url, **kwargs)
 
     async def execute(self, method, path, **kwargs):
-        if (
-            self._use_specs
-            and self._validate_using_specs
-            and not self.specs.exists(method, path)
-        ):
+        specs = await self._get_validation_specs()
+        if specs and not specs.exists(method, path):
             # TODO more info, specs version, method etc
             raise ClientError(f'The path `{path}` does not exist.')
+        self._validate_payload(specs, method, path, kwargs)
 
         url = f'{self.endpoint}/{path}'
+        if '?' in url and kwargs.get('params'):
+            # httpx replaces the query string of the url with ``params``
+            # while requests appends them to it, as RQL filters need.
+            url = f'{url}&{urlencode(kwargs.pop("params"))}'
 
         kwargs = self._prepare_call_kwargs(kwargs)
 
         self.response = None
 
+        # Other tasks can replace self.response while this one is waiting,
+        # so only the response returned by the call is used.
         try:
-            await self._execute_http_call(method, url, kwargs)
-            if self.response.status_code == 204:
-                return None
-            if self.response.headers.get('Content-Type') == 'application/json':
-                return self.response.json()
-            else:
-                return self.response.content
-
+            response = await self._execute_http_call(method, url, kwargs)
         except HTTPError as re:
-            api_error = self._get_api_error_details() or {}
-            status_code = self.response.status_code if self.response is not None else None
+            response = re.response if isinstance(re, HTTPStatusError) else None
+            api_error = self._get_api_error_details(response) or {}
+            status_code = response.status_code if response is not None else None
             raise ClientError(status_code=status_code, **api_error) from re
 
+        if response.status_code == 204:
+            return None
+        if response.headers.get('Content-Type') != 'application/json':
+            return response.content
+        result = self.json_codec.loads(response.content)
+        self._validate_response(specs, method, path, response, result)
+        return result
+
     async def _execute_http_call(self, method, url, kwargs):
-        retry_count = 0
+        request_kwargs = self._encode_json_payload(kwargs, 'content')
+        retry = self.retry_policy.start(method)
         while True:
-            if self.logger:
-                self.logger.log_request(method, url, kwargs)
-
-            async with httpx.AsyncClient() as client:
-                self.response = await client.request(method, url, **kwargs)
-
-            if self.logger:
-                self.logger.log_response(self.response)
-
-            if (  # pragma: no branch
-                self.response.status_code >= 500
-                and retry_count < self.max_retries
-            ):
-                retry_count += 1
-                time.sleep(1)
-                continue
-            break  # pragma: no cover
-        if self.response.status_code >= 400:
-            self.response.raise_for_status()
+            await self._wait_for_rate_limiter()
+            response, delay = await self._send_request(method, url, kwargs, request_kwargs, retry)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        if response.status_code >= 400:
+            response.raise_for_status()
+        return response
+
+    async def _wait_for_rate_limiter(self):
+        if self.rate_limiter:
+            wait = self.rate_limiter.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+
+    async def _send_request(self, method, url, kwargs, request_kwargs, retry):
+        # Returns the response, if any, and the number of seconds to wait
+        # before retrying or None if the call must not be retried.
+        if self.logger:
+            self.logger.log_request(method, url, kwargs)
+
+        try:
+            response = await self.session.request(method, url, **request_kwargs)
+        except HTTPError as e:
+            delay = retry.next_delay(exception=e)
+            if delay is None:
+                raise
+            return None, delay
+
+        self.response = response
+        if self.logger:
+            self.logger.log_response(response)
+
+        return response, retry.next_delay(response=response)
+
+    def _create_session(self):
+        return httpx.AsyncClient(limits=self.limits, http2=self.http2)
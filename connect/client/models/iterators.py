@@ -3,13 +3,20 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
-from connect.client.utils import get_values, parse_content_range
+import asyncio
+from collections import deque
+
+from connect.client.exceptions import ClientError
+from connect.client.utils import get_values, parse_content_range, resolve_attribute
 
 
 class aiter:
     def __init__(self, values):
         self._values = iter(values)
 
+    def __aiter__(self):
+        return self
+
     async def __anext__(self):
         try:
             return next(self._values)
@@ -27,47 +34,143 @@ class AbstractBaseIterator:
         self._config = config
         self._kwargs = kwargs
         self._loaded = False
+        self._prefetch = kwargs.get('prefetch') or 0
+        self._keyset = kwargs.get('keyset')
+        self._cache = kwargs.get('cache', True)
+        self._page = None
+        self._content_range = None
+        self._pending = deque()
+        self._next_offset = None
+        self._last_key = None
+
+    def __del__(self):
+        self.close()
 
     def get_item(self, item):
         raise NotImplementedError('get_item must be implemented in subclasses.')
 
+    def close(self):
+        """
+        Cancel the requests of the pages being prefetched.
+        It is called automatically when the iterator is garbage collected.
+        """
+        while self._pending:
+            self._pending.popleft().cancel()
+
+    def _get_page_config(self, offset):
+        config = dict(self._config)
+        config['params'] = dict(self._config['params'], offset=offset)
+        return config
+
+    def _set_first_page(self, results, content_range):
+        if self._cache:
+            self._rs._results = results
+        self._set_page(results, content_range)
+        self._loaded = True
+
+    def _set_next_page(self, results, content_range):
+        if self._cache:
+            self._rs._results.extend(results)
+        self._set_page(results, content_range)
+
+    def _set_page(self, results, content_range):
+        # Keyset pages after the first one only count the resources left,
+        # so the ResourceSet keeps the range of the first page.
+        if not (self._keyset and self._loaded):
+            self._rs._content_range = content_range
+        self._content_range = content_range
+        self._page = results
+        self._results_iterator = iter(results)
+
+    def _check_key(self, item):
+        # Keys must be present and strictly follow each other, otherwise the
+        # next page could start again from the same key (ex. a non unique key
+        # or a filter ignored by the server) and be requested forever.
+        field = self._keyset.lstrip('-')
+        key = resolve_attribute(field, item)
+        if key is None:
+            raise ClientError(f'Cannot iterate by `{field}`: a resource has no `{field}`.')
+        if self._last_key is not None and not (
+            key < self._last_key if self._keyset.startswith('-') else key > self._last_key
+        ):
+            raise ClientError(
+                f'Cannot iterate by `{field}`: `{key}` does not follow `{self._last_key}`.',
+            )
+        self._last_key = key
+
+    def _move_to_next_keyset_page(self):
+        self._query = self._rs._get_keyset_qs(self._last_key)
+        self._config['params']['offset'] = 0
+
+    def _get_offsets_to_prefetch(self):
+        limit = self._config['params']['limit']
+        count = self._rs._content_range.count
+        if self._next_offset is None:
+            self._next_offset = self._config['params']['offset'] + limit
+        while len(self._pending) < self._prefetch and self._next_offset < count:
+            yield self._next_offset
+            self._next_offset += limit
+
 
 class AbstractIterator(AbstractBaseIterator):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._incremental = kwargs.get('incremental', False)
+
+    def __iter__(self):
+        return self
 
     def _load(self):
         if not self._loaded:
-            self._rs._results, self._rs._content_range = self._execute_request()
-            self._results_iterator = iter(self._rs._results)
-            self._loaded = True
+            self._set_first_page(*self._execute_request())
 
     def __next__(self):
         self._load()
 
-        if not self._rs._results:
+        if not self._page:
             raise StopIteration
         try:
             item = next(self._results_iterator)
         except StopIteration:
             if (
-                self._rs._content_range is None
-                or self._rs._content_range.last >= self._rs._content_range.count - 1
+                self._content_range is None
+                or self._content_range.last >= self._content_range.count - 1
             ):
                 raise
-            self._config['params']['offset'] += self._config['params']['limit']
-            results, cr = self._execute_request()
+            results, cr = self._fetch_next_page()
             if not results:
                 raise
-            self._rs._content_range = cr
-            self._rs._results.extend(results)
-            self._results_iterator = iter(results)
+            self._set_next_page(results, cr)
             item = next(self._results_iterator)
 
+        if self._keyset:
+            self._check_key(item)
         return self.get_item(item)
 
-    def _execute_request(self):
-        results = self._client.get(
+    def _fetch_next_page(self):
+        if self._keyset:
+            self._move_to_next_keyset_page()
+            return self._execute_request()
+
+        if not self._prefetch:
+            self._config['params']['offset'] += self._config['params']['limit']
+            return self._execute_request()
+
+        for offset in self._get_offsets_to_prefetch():
+            self._pending.append(
+                self._client.submit(self._execute_request, self._get_page_config(offset)),
+            )
+
+        if not self._pending:
+            return None, None
+
+        return self._pending.popleft().result()
+
+    def _execute_request(self, config=None):
+        get = self._client.get_items if self._incremental else self._client.get
+        results = get(
             f'{self._path}?{self._query}',
-            **self._config,
+            **(config or self._config),
         )
         content_range = parse_content_range(
             self._client.response.headers.get('Content-Range'),
@@ -77,40 +180,59 @@ class AbstractIterator(AbstractBaseIterator):
 
 class AbstractAsyncIterator(AbstractBaseIterator):
 
+    def __aiter__(self):
+        return self
+
     async def _load(self):
         if not self._loaded:
-            self._rs._results, self._rs._content_range = await self._execute_request()
-            self._results_iterator = iter(self._rs._results)
-            self._loaded = True
+            self._set_first_page(*await self._execute_request())
 
     async def __anext__(self):
         await self._load()
 
-        if not self._rs._results:
+        if not self._page:
             raise StopAsyncIteration
         try:
             item = next(self._results_iterator)
         except StopIteration:
             if (
-                self._rs._content_range is None
-                or self._rs._content_range.last >= self._rs._content_range.count - 1
+                self._content_range is None
+                or self._content_range.last >= self._content_range.count - 1
             ):
                 raise StopAsyncIteration
-            self._config['params']['offset'] += self._config['params']['limit']
-            results, cr = await self._execute_request()
+            results, cr = await self._fetch_next_page()
             if not results:
                 raise StopAsyncIteration
-            self._rs._content_range = cr
-            self._rs._results.extend(results)
-            self._results_iterator = iter(results)
+            self._set_next_page(results, cr)
             item = next(self._results_iterator)
 
+        if self._keyset:
+            self._check_key(item)
         return self.get_item(item)
 
-    async def _execute_request(self):
+    async def _fetch_next_page(self):
+        if self._keyset:
+            self._move_to_next_keyset_page()
+            return await self._execute_request()
+
+        if not self._prefetch:
+            self._config['params']['offset'] += self._config['params']['limit']
+            return await self._execute_request()
+
+        for offset in self._get_offsets_to_prefetch():
+            self._pending.append(
+                asyncio.ensure_future(self._execute_request(self._get_page_config(offset))),
+            )
+
+        if not self._pending:
+            return None, None
+
+        return await self._pending.popleft()
+
+    async def _execute_request(self, config=None):
         results = await self._client.get(
             f'{self._path}?{self._query}',
-            **self._config,
+            **(config or self._config),
         )
         content_range = parse_content_range(
             self._client.response.headers.get('Content-Range'),
@@ -3,7 +3,8 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
-import copy
+import asyncio
+from collections import deque
 
 from connect.client.models.exceptions import NotYetEvaluatedError
 from connect.client.models.iterators import (
@@ -13,7 +14,7 @@ from connect.client.models.iterators import (
     ValuesListIterator,
     aiter,
 )
-from connect.client.utils import parse_content_range, resolve_attribute
+from connect.client.utils import ContentRange, parse_content_range, resolve_attribute
 from connect.client.rql import R
 
 
@@ -30,7 +31,7 @@ class _ResourceSetBase:
 
         self._client = client
         self._path = path
-        self._query = query or R()
+        self._query = R(_expr=query) if isinstance(query, str) else query or R()
         self._results = None
         self._limit = self._client.default_limit or 100
         self._offset = 0
@@ -38,9 +39,11 @@ class _ResourceSetBase:
         self._content_range = None
         self._fields = None
         self._search = None
-        self._select = []
-        self._ordering = []
+        self._select = ()
+        self._ordering = ()
         self._config = {}
+        self._prefetch = 0
+        self._keyset = None
 
     @property
     def path(self):
@@ -63,7 +66,7 @@ class _ResourceSetBase:
         :rtype: ResourceSet
         """
         copy = self._copy()
-        copy._config = kwargs or {}
+        copy._config = kwargs
         return copy
 
     def limit(self, limit):
@@ -88,15 +91,72 @@ class _ResourceSetBase:
         copy._limit = limit
         return copy
 
+    def prefetch(self, pages):
+        """
+        Set the number of pages to fetch concurrently in advance
+        while iterating over this ResourceSet.
+        Pages are still returned in order.
+
+        :param pages: number of pages to keep in flight, 0 disables prefetching.
+        :type pages: int
+        :raises TypeError: if `pages` is not an integer.
+        :raises ValueError: if `pages` is negative.
+        :return: A copy of this ResourceSet class with prefetching enabled.
+        :rtype: ResourceSet
+        """
+        if not isinstance(pages, int):
+            raise TypeError('`pages` must be an integer.')
+
+        if pages < 0:
+            raise ValueError('`pages` must be a positive integer.')
+
+        copy = self._copy()
+        copy._prefetch = pages
+        return copy
+
+    def iterate_by_key(self, field='id'):
+        """
+        Paginate over this ResourceSet using the value of ``field``
+        instead of the offset (keyset pagination).
+
+        Resources are ordered by ``field`` and each page after the first
+        is requested filtering out the resources up to the last one received,
+        so the cost of each page does not grow with the offset and the results
+        do not shift if resources are created while iterating.
+        Prefix ``field`` with ``-`` to iterate in descending order.
+
+        ``field`` must be unique and must not change while iterating.
+        Pages are fetched one at a time so prefetching is ignored.
+        Since the resources are ordered by ``field`` it cannot be combined
+        with ``order_by``. Iterating raises a ``ClientError`` if a resource
+        has no ``field`` (ex. it has been excluded by ``select``) or if
+        the values of ``field`` don't strictly follow each other.
+
+        :param field: The field to paginate by, defaults to ``id``.
+        :type field: str
+        :raises ValueError: if an ordering has been set.
+        :return: A copy of this ResourceSet class with keyset pagination enabled.
+        :rtype: ResourceSet
+        """
+        if self._ordering:
+            raise ValueError('`iterate_by_key` cannot be combined with `order_by`.')
+        copy = self._copy()
+        copy._keyset = field
+        copy._ordering = (field,)
+        return copy
+
     def order_by(self, *fields):
         """
         Add fields for ordering.
 
+        :raises ValueError: if keyset pagination has been enabled.
         :return: This ResourceSet object.
         :rtype: ResourceSet
         """
+        if self._keyset:
+            raise ValueError('`iterate_by_key` cannot be combined with `order_by`.')
         copy = self._copy()
-        copy._ordering.extend(fields)
+        copy._ordering = self._ordering + fields
         return copy
 
     def select(self, *fields):
@@ -108,7 +168,7 @@ class _ResourceSetBase:
         :rtype: ResourceSet
         """
         copy = self._copy()
-        copy._select.extend(fields)
+        copy._select = self._select + fields
         return copy
 
     def filter(self, *args, **kwargs):
@@ -163,6 +223,40 @@ class _ResourceSetBase:
 
         return copy
 
+    def filter_in_batches(self, field, values, batch_size=100, workers=4, key='id'):
+        """
+        Iterate over the resources of this ResourceSet whose ``field``
+        is one of ``values`` splitting ``values`` in batches of ``batch_size``
+        so that the request URLs don't get too long.
+
+        A query is issued for each batch, at most ``workers`` batches are fetched
+        concurrently. Results are returned batch by batch, resources that match
+        more than one batch are returned only once.
+
+        Ex.
+
+        .. code-block:: python
+
+            for asset in client.assets.filter_in_batches('product.id', product_ids):
+                ...
+
+        :param field: The field to filter by.
+        :type field: str
+        :param values: The values to look for.
+        :type values: Iterable[str]
+        :param batch_size: Maximum number of values per query, defaults to 100.
+        :type batch_size: int, optional
+        :param workers: Maximum number of batches fetched at once, defaults to 4.
+        :type workers: int, optional
+        :param key: The field that identifies a resource, used to discard
+                    duplicates, defaults to ``id``.
+        :type key: str, optional
+        :raises TypeError: if `batch_size` is not an integer.
+        :raises ValueError: if `batch_size` is not positive non-zero.
+        :return: A resources iterator.
+        """
+        return self._iterate_batches(self._get_batches(field, values, batch_size), workers, key)
+
     def all(self):
         """
         Returns a copy of the current ResourceSet.
@@ -223,12 +317,27 @@ class _ResourceSetBase:
         qs = ''
         if self._select:
             qs += f'&select({",".join(self._select)})'
-        if self._query:
-            qs += f'&{str(self._query)}'
+        query = self._query.optimize()
+        if query:
+            qs += f'&{str(query)}'
         if self._ordering:
             qs += f'&ordering({",".join(self._ordering)})'
         return qs[1:] if qs else ''
 
+    def _matches_nothing(self):
+        # The query has been simplified to a contradiction, no need to ask
+        # the server for resources that cannot exist.
+        if self._query.optimize() is not None:
+            return False
+        self._content_range = ContentRange(0, -1, 0)
+        return True
+
+    def _get_keyset_qs(self, last_value):
+        field = self._keyset.lstrip('-')
+        if self._keyset.startswith('-'):
+            return self.filter(R().n(field).lt(last_value))._build_qs()
+        return self.filter(R().n(field).gt(last_value))._build_qs()
+
     def _get_request_url(self):
         url = f'{self._path}'
         qs = self._build_qs()
@@ -238,30 +347,67 @@ class _ResourceSetBase:
         return url
 
     def _get_request_kwargs(self):
-        config = copy.deepcopy(self._config)
-        config.setdefault('params', {})
+        config = dict(self._config)
+        if 'headers' in config:
+            config['headers'] = dict(config['headers'])
 
-        config['params'].update({
+        config['params'] = {
+            **config.get('params', {}),
             'limit': self._limit,
             'offset': self._offset,
-        })
+        }
 
         if self._search:
             config['params']['search'] = self._search
 
         return config
 
-    def _copy(self):
-        rs = self.__class__(self._client, self._path, self._query)
-        rs._limit = self._limit
-        rs._offset = self._offset
-        rs._slice = self._slice
-        rs._fields = self._fields
-        rs._search = self._search
-        rs._select = copy.copy(self._select)
-        rs._ordering = copy.copy(self._ordering)
-        rs._config = copy.deepcopy(self._config)
+    def _get_page_offsets(self):
+        return range(self._offset, self._content_range.count, self._limit)
+
+    def _get_page_kwargs(self, offset):
+        kwargs = self._get_request_kwargs()
+        kwargs['params']['offset'] = offset
+        return kwargs
+
+    def _merge_pages(self, pages):
+        self._results = [item for page in pages for item in page]
+        if self._fields:
+            return [self._get_values(item) for item in self._results]
+        return self._results
+
+    def _get_batches(self, field, values, batch_size):
+        if not isinstance(batch_size, int):
+            raise TypeError('`batch_size` must be an integer.')
+
+        if batch_size <= 0:
+            raise ValueError('`batch_size` must be a positive, non-zero integer.')
+
+        values = list(dict.fromkeys(values))
+        rs = self._copy()
+        rs._fields = None
+        return [
+            rs.filter(R().n(field).in_(values[idx:idx + batch_size]))
+            for idx in range(0, len(values), batch_size)
+        ]
+
+    def _merge_batch(self, results, seen, key):
+        for item in results:
+            value = resolve_attribute(key, item)
+            if value is not None:
+                if value in seen:
+                    continue
+                seen.add(value)
+            yield self._get_values(item) if self._fields else item
 
+    def _copy(self):
+        # The state of a ResourceSet is never modified in place once it has
+        # been copied (tuples, R objects and configuration dictionaries are
+        # replaced, not mutated) so copies can share it safely.
+        rs = self.__class__.__new__(self.__class__)
+        rs.__dict__.update(self.__dict__)
+        rs._results = None
+        rs._content_range = None
         return rs
 
     def help(self):
@@ -368,7 +514,87 @@ class ResourceSet(_ResourceSetBase):
         self._fetch_all()
         return self._results[0] if self._results else None
 
-    def _iterator(self):
+    def stream(self, incremental=False):
+        """
+        Returns an iterator over the set of resources that doesn't keep
+        the fetched resources in this ResourceSet: each page is discarded
+        once consumed, so memory usage is bounded by the page size.
+
+        If ``incremental`` is True, resources are decoded one at a time while
+        each page is received instead of decoding the whole page at once,
+        reducing the peak memory usage and the time to the first resource
+        for large pages. Incrementally decoded resources are not validated
+        against the specifications.
+
+        :param incremental: decode pages incrementally, defaults to False.
+        :type incremental: bool, optional
+        :return: A resources iterator.
+        :rtype: ResourceIterator
+        """
+        return self._iterator(cache=False, incremental=incremental)
+
+    def fetch_parallel(self, workers=4):
+        """
+        Fetch all the resources that belong to this ResourceSet
+        issuing the requests for the pages concurrently.
+
+        The total number of resources is retrieved first, then the pages
+        are fetched by the thread pool of the client, at most ``workers``
+        at once, and merged in order.
+
+        :param workers: Maximum number of concurrent requests, defaults to 4.
+        :type workers: int, optional
+        :return: The list of resources (or values if ``values_list`` was applied).
+        :rtype: list
+        """
+        if self._slice or self._results is not None:
+            self._fetch_all()
+            return self._merge_pages([self._results])
+
+        self.count()
+        url = self._get_request_url()
+        pages = self._map_concurrently(
+            lambda offset: self._client.get(url, **self._get_page_kwargs(offset)),
+            self._get_page_offsets(),
+            workers,
+        )
+        return self._merge_pages(pages)
+
+    def _iterate_batches(self, batches, workers, key):
+        seen = set()
+        # Batches are fetched by the thread pool of the client: don't let them
+        # prefetch pages through the same pool while waiting for them.
+        pages = self._map_concurrently(
+            lambda rs: list(rs.prefetch(0).stream()),
+            batches,
+            workers,
+        )
+        try:
+            for results in pages:
+                yield from self._merge_batch(results, seen, key)
+        finally:
+            pages.close()
+
+    def _map_concurrently(self, fn, items, workers):
+        # Run fn for each item through the thread pool of the client keeping
+        # at most workers calls in flight, results are returned in order.
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(self._client.submit(fn, item))
+                if len(pending) >= workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _iterator(self, cache=True, incremental=False):
+        if self._matches_nothing():
+            if cache:
+                self._results = []
+            return iter(())
         args = (
             self,
             self._client,
@@ -376,13 +602,21 @@ class ResourceSet(_ResourceSetBase):
             self._build_qs(),
             self._get_request_kwargs(),
         )
+        options = {
+            'prefetch': self._prefetch,
+            'keyset': self._keyset,
+            'cache': cache,
+            'incremental': incremental,
+        }
         iterator = (
-            ValuesListIterator(*args, fields=self._fields)
-            if self._fields else ResourceIterator(*args)
+            ValuesListIterator(*args, fields=self._fields, **options)
+            if self._fields else ResourceIterator(*args, **options)
         )
         return iterator
 
     def _execute_request(self, url, kwargs):
+        if self._matches_nothing():
+            return []
         results = self._client.get(url, **kwargs)
         self._content_range = parse_content_range(
             self._client.response.headers.get('Content-Range'),
@@ -487,7 +721,76 @@ class AsyncResourceSet(_ResourceSetBase):
         await self._fetch_all()
         return self._results[0] if self._results else None
 
-    def _iterator(self):
+    def stream(self):
+        """
+        Returns an asynchronous iterator over the set of resources that doesn't keep
+        the fetched resources in this ResourceSet: each page is discarded
+        once consumed, so memory usage is bounded by the page size.
+
+        :return: A resources iterator.
+        :rtype: AsyncResourceIterator
+        """
+        return self._iterator(cache=False)
+
+    async def fetch_parallel(self, workers=4):
+        """
+        Fetch all the resources that belong to this ResourceSet
+        issuing the requests for the pages concurrently.
+
+        The total number of resources is retrieved first, then the pages
+        are fetched running at most ``workers`` requests at once and merged in order.
+
+        :param workers: Maximum number of concurrent requests, defaults to 4.
+        :type workers: int, optional
+        :return: The list of resources (or values if ``values_list`` was applied).
+        :rtype: list
+        """
+        if self._slice or self._results is not None:
+            await self._fetch_all()
+            return self._merge_pages([self._results])
+
+        await self.count()
+        url = self._get_request_url()
+        pages = self._map_concurrently(
+            lambda offset: self._client.get(url, **self._get_page_kwargs(offset)),
+            self._get_page_offsets(),
+            workers,
+        )
+        return self._merge_pages([page async for page in pages])
+
+    async def _iterate_batches(self, batches, workers, key):
+        async def _fetch_batch(rs):
+            return [item async for item in rs.stream()]
+
+        seen = set()
+        pages = self._map_concurrently(_fetch_batch, batches, workers)
+        try:
+            async for results in pages:
+                for item in self._merge_batch(results, seen, key):
+                    yield item
+        finally:
+            await pages.aclose()
+
+    async def _map_concurrently(self, fn, items, workers):
+        # Run fn for each item keeping at most workers calls in flight,
+        # results are returned in order.
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(asyncio.ensure_future(fn(item)))
+                if len(pending) >= workers:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _iterator(self, cache=True):
+        if self._matches_nothing():
+            if cache:
+                self._results = []
+            return aiter(())
         args = (
             self,
             self._client,
@@ -495,14 +798,16 @@ class AsyncResourceSet(_ResourceSetBase):
             self._build_qs(),
             self._get_request_kwargs(),
         )
-
+        options = {'prefetch': self._prefetch, 'keyset': self._keyset, 'cache': cache}
         iterator = (
-            AsyncValuesListIterator(*args, fields=self._fields)
-            if self._fields else AsyncResourceIterator(*args)
+            AsyncValuesListIterator(*args, fields=self._fields, **options)
+            if self._fields else AsyncResourceIterator(*args, **options)
         )
         return iterator
 
     async def _execute_request(self, url, kwargs):
+        if self._matches_nothing():
+            return []
         results = await self._client.get(url, **kwargs)
         self._content_range = parse_content_range(
             self._client.response.headers.get('Content-Range'),
@@ -3,19 +3,175 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
-from io import StringIO
-from functools import partial
+import argparse
+import asyncio
+import json
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+
+import httpx
 
 import requests
 
 import yaml
 
+from connect.client.validation import SchemaCompiler
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader
+
+
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+PathMatch = namedtuple('PathMatch', ('template', 'methods'))
+
+
+class _PathNode:
+    """
+    A node of the index used to match concrete paths against
+    the path templates of the specs.
+    """
+    __slots__ = ('literals', 'wildcard', 'template', 'order')
+
+    def __init__(self):
+        self.literals = {}
+        self.wildcard = None
+        self.template = None
+        self.order = None
+
+    def add(self, template, order):
+        node = self
+        for comp in template[1:].split('/'):
+            if comp.startswith('{'):
+                if node.wildcard is None:
+                    node.wildcard = _PathNode()
+                node = node.wildcard
+            else:
+                node = node.literals.setdefault(comp, _PathNode())
+        if node.template is None:
+            node.template = template
+            node.order = order
+
+    def match(self, components, idx=0):
+        """
+        Returns the node of the first declared template that matches ``components``
+        or None if no template matches.
+        """
+        if idx == len(components):
+            return self if self.template is not None else None
+
+        candidates = []
+        literal = self.literals.get(components[idx])
+        if literal is not None:
+            candidates.append(literal.match(components, idx + 1))
+        if self.wildcard is not None:
+            candidates.append(self.wildcard.match(components, idx + 1))
+        candidates = [node for node in candidates if node is not None]
+        return min(candidates, key=lambda node: node.order) if candidates else None
+
+
+class _ResourceNode:
+    """
+    A node of the tree of namespaces, collections, resources and actions
+    described by the paths of the specs.
+    Path parameters at the same level share the same node whatever their name is.
+    """
+    __slots__ = ('name', 'children', 'template', 'paths', 'has_literal_leaf')
+
+    def __init__(self, name):
+        self.name = name
+        self.children = {}
+        self.template = None
+        self.paths = []
+        self.has_literal_leaf = False
+
+    @property
+    def is_template(self):
+        return self.name.startswith('{')
+
+    @property
+    def is_collection(self):
+        return self.template is not None or any(
+            child.is_template for child in self.children.values()
+        )
+
+    @property
+    def is_namespace(self):
+        return any(not child.is_template for child in self.children.values())
+
+    def add(self, template):
+        components = template[1:].split('/')
+        literal_leaf = not components[-1].startswith('{')
+        node = self
+        for component in components:
+            key = self._get_key(component)
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _ResourceNode(component)
+            node = child
+            node.paths.append(template)
+            node.has_literal_leaf = node.has_literal_leaf or literal_leaf
+        node.template = template
+
+    def find(self, path):
+        node = self
+        for component in path.strip('/').split('/'):
+            node = node.children.get(self._get_key(component))
+            if node is None:
+                return None
+        return node
+
+    def _get_key(self, component):
+        return '{}' if component.startswith('{') else component
+
 
 class OpenAPISpecs:
 
-    def __init__(self, location):
+    def __init__(self, location, cache_size=1024, cache=None, specs=None, lean=False):
         self._location = location
-        self._specs = self._load()
+        self._cache = cache
+        self._lean = lean
+        self._specs = specs if specs is not None else self._load()
+        self._help_sections = None
+        self._compilers = {}
+        self._validators = {}
+        if lean:
+            self._specs = lean_specs(self._specs)
+        self._literals = set()
+        self._path_index = self._build_path_index()
+        self._resource_tree = self._build_resource_tree()
+        self._match_path = lru_cache(maxsize=cache_size)(self._find_path)
+
+    @classmethod
+    async def aload(cls, location, cache_size=1024, cache=None, lean=False):
+        """
+        Load the specifications without blocking the running event loop.
+        Specifications are downloaded using httpx while parsing them and
+        accessing the file system happen in the default executor.
+
+        :param location: The OpenAPI specification local path or URL.
+        :type location: str
+        :param cache_size: Maximum number of matched paths to cache, defaults to 1024
+        :type cache_size: int, optional
+        :param cache: The on disk cache used to load the specifications, defaults to None
+        :type cache: SpecsCache, optional
+        :param lean: Load the specifications in lean mode, defaults to False
+        :type lean: bool, optional
+        :return: The loaded specifications.
+        :rtype: OpenAPISpecs
+        """
+        loop = asyncio.get_event_loop()
+        specs = None
+        if location.startswith('http'):
+            specs = await _aload_from_url(loop, location, cache)
+        return await loop.run_in_executor(
+            None,
+            partial(cls, location, cache_size=cache_size, cache=cache, specs=specs, lean=lean),
+        )
 
     @property
     def title(self):
@@ -23,7 +179,7 @@ class OpenAPISpecs:
 
     @property
     def description(self):
-        return self._specs['info']['description'] if self._specs else None
+        return self._get_section('info', 'description') if self._specs else None
 
     @property
     def version(self):
@@ -34,43 +190,75 @@ class OpenAPISpecs:
         return self._specs.get('tags') if self._specs else None
 
     def exists(self, method, path):
-        p = self._get_path(path)
-        if not p:
+        match = self._match_path(self._normalize_path(path))
+        if not match:
             return False
-        info = self._specs['paths'][p]
-        return method.lower() in info
+        return method.lower() in match.methods
+
+    def cache_info(self):
+        """
+        Returns the statistics of the cache of the matched paths.
+        Paths that differ only in the value of their parameters share the same entry.
+
+        :return: the number of hits and misses, the maximum and the current size.
+        :rtype: functools._CacheInfo
+        """
+        return self._match_path.cache_info()
+
+    def validate_request(self, method, path, payload):
+        """
+        Validate a JSON request payload against the schema of the operation.
+
+        :param method: The http method.
+        :type method: str
+        :param path: The path of the call.
+        :type path: str
+        :param payload: The decoded JSON payload.
+        :return: The list of validation errors, empty if the payload is valid or
+                 the operation has no JSON request body.
+        :rtype: list
+        """
+        validator = self._get_validator(method, path, 'request', None)
+        return validator(payload) if validator else []
+
+    def validate_response(self, method, path, status_code, content):
+        """
+        Validate a JSON response against the schema of the operation.
+
+        :param method: The http method.
+        :type method: str
+        :param path: The path of the call.
+        :type path: str
+        :param status_code: The http status code of the response.
+        :type status_code: int
+        :param content: The decoded JSON response.
+        :return: The list of validation errors, empty if the response is valid or
+                 the operation has no JSON schema for the status code.
+        :rtype: list
+        """
+        validator = self._get_validator(method, path, 'response', status_code)
+        return validator(content) if validator else []
 
     def get_namespaces(self):
-        def _is_namespace(path):
-            comp = path[1:].split('/', 1)
-            return len(comp) > 1 and not comp[1].startswith('{')
         return sorted(
-            list(
-                {
-                    p[1:].split('/', 1)[0]
-                    for p in filter(_is_namespace, self._specs['paths'].keys())
-                },
-            ),
+            node.name for node in self._resource_tree.children.values()
+            if node.is_namespace
         )
 
     def get_collections(self):
-        namespaces = self.get_namespaces()
-        cols = set()
-        for p in self._specs['paths'].keys():
-            name = p[1:].split('/', 1)[0]
-            if name not in namespaces:
-                cols.add(name)
-
-        return sorted(cols)
+        return sorted(
+            node.name for node in self._resource_tree.children.values()
+            if not node.is_namespace
+        )
 
     def get_namespaced_collections(self, path):
-        nested = filter(lambda x: x[1:].startswith(path), self._specs['paths'].keys())
-        collections = set()
-        for p in nested:
-            splitted = p[len(path) + 1:].split('/', 2)
-            if self._is_collection(p) and len(splitted) == 2:
-                collections.add(splitted[1])
-        return list(sorted(collections))
+        node = self._resource_tree.find(path)
+        if not node:
+            return []
+        return sorted(
+            child.name for child in node.children.values()
+            if child.template is not None
+        )
 
     def get_collection(self, path):
         return self._get_info(path)
@@ -83,70 +271,37 @@ class OpenAPISpecs:
 
     def get_actions(self, path):
         p = self._get_path(path)
-        nested = filter(
-            lambda x: x.startswith(p) and x != p,
-            self._specs['paths'].keys(),
-        )
-
-        actions = set()
-        descriptions = {}
-        for np in nested:
-            name = np[len(p) + 1:]
-            actions.add(name)
+        node = self._resource_tree.find(p)
+        actions = {}
+        for np in node.paths:
+            if not np.startswith(f'{p}/'):
+                continue
             info = self._specs['paths'][np]
-            summary = info['summary'] if 'summary' in info else ''
-            if summary:
-                descriptions[name] = summary
+            actions[np[len(p) + 1:]] = info.get('summary')
         return [
-            (name, descriptions.get(name))
+            (name, actions[name] or None)
             for name in sorted(actions)
         ]
 
     def get_nested_namespaces(self, path):
-        def _is_nested_namespace(base_path, path):
-            if path[1:].startswith(base_path):
-                comp = path[1:].split('/')
-                return (
-                    len(comp) > 1
-                    and not comp[-1].startswith('{')
-                )
-            return False
-
-        nested = filter(
-            partial(_is_nested_namespace, path),
-            self._specs['paths'].keys(),
-        )
-        current_level = len(path[1:].split('/'))
-        nested_namespaces = []
-        for ns in nested:
-            name = ns[1:].split('/')[current_level]
-            if not self._is_collection(f'/{path}/{name}'):
-                nested_namespaces.append(name)
-        return nested_namespaces
+        node = self._resource_tree.find(path)
+        if not node:
+            return []
+        return [
+            child.name for child in node.children.values()
+            if child.has_literal_leaf and not child.is_collection
+        ]
 
     def get_nested_collections(self, path):
         p = self._get_path(path)
-        nested = filter(
-            lambda x: x.startswith(p[0:p.rindex('{')]) and x != p,
-            self._specs['paths'].keys(),
-        )
-        cut_pos = p.count('/')
-        collections = set()
-        descriptions = {}
-        for np in nested:
-            splitted = np[1:].split('/')
-            name = splitted[cut_pos]
-            info = self._specs['paths'][np]
-            method_info = info['get'] if 'get' in info else info['post']
-            operation_id = method_info['operationId']
-            if self._is_action(operation_id):
-                continue
-            collections.add(name)
-            summary = info['summary'] if 'summary' in info else ''
-            if summary:
-                descriptions[name] = summary
+        node = self._resource_tree.find(p)
+        collections = {}
+        for child in node.children.values():
+            for summary in self._get_collection_summaries(child):
+                if summary or child.name not in collections:
+                    collections[child.name] = summary
         return [
-            (name, descriptions.get(name))
+            (name, collections[name] or None)
             for name in sorted(collections)
         ]
 
@@ -156,51 +311,435 @@ class OpenAPISpecs:
         return self._load_from_fs()
 
     def _load_from_url(self):
-        res = requests.get(self._location, stream=True)
+        if not self._cache:
+            return self._download()
+
+        entry = self._cache.get(self._location)
+        if entry and self._cache.is_fresh(entry):
+            return entry['specs']
+
+        headers = self._cache.get_validators(entry) if entry else {}
+        try:
+            res = self._request(headers)
+        except requests.RequestException:
+            if entry:
+                return entry['specs']
+            raise
+
+        if res.status_code == 304 and entry:
+            self._cache.touch(self._location, entry)
+            return entry['specs']
+        if res.status_code >= 500 and entry:
+            return entry['specs']
+
+        specs = self._parse_response(res)
+        self._cache.set(
+            self._location,
+            specs,
+            etag=res.headers.get('ETag'),
+            last_modified=res.headers.get('Last-Modified'),
+        )
+        return specs
+
+    def _download(self):
+        return self._parse_response(self._request())
+
+    def _request(self, headers=None):
+        return requests.get(self._location, headers=headers, stream=True)
+
+    def _parse_response(self, res):
         if res.status_code == 200:
-            result = StringIO()
-            for chunk in res.iter_content(chunk_size=8192):
-                result.write(str(chunk, encoding='utf-8'))
-            result.seek(0)
-            return yaml.safe_load(result)
+            content = b''.join(res.iter_content(chunk_size=65536))
+            return parse_specs(content.decode('utf-8'))
         res.raise_for_status()
 
     def _load_from_fs(self):
-        with open(self._location, 'r') as f:
-            return yaml.safe_load(f)
+        with open(self._location, 'r', encoding='utf-8') as f:
+            return parse_specs(f.read())
 
-    def _get_path(self, path):
+    def _build_path_index(self):
+        root = _PathNode()
+        for order, template in enumerate(self._specs['paths'].keys()):
+            root.add(template, order)
+            self._literals.update(
+                comp for comp in template[1:].split('/') if not comp.startswith('{')
+            )
+        return root
+
+    def _build_resource_tree(self):
+        root = _ResourceNode('')
+        for template in self._specs['paths'].keys():
+            root.add(template)
+        return root
+
+    def _normalize_path(self, path):
+        # Components that are not a literal of any template can only match
+        # a path parameter, replacing them with a placeholder lets all the
+        # paths with the same shape (``products/PRD-000``, ``products/PRD-001``)
+        # share the same entry of the cache.
         if '?' in path:
             path, _ = path.split('?', 1)
-        components = path.split('/')
-        for p in self._specs['paths'].keys():
-            cmps = p[1:].split('/')
-            if len(cmps) != len(components):
-                continue
-            for idx, comp in enumerate(components):
-                if cmps[idx].startswith('{'):
-                    continue
-                if cmps[idx] != comp:
-                    break
-            else:
-                return p
+        return tuple(
+            comp if comp in self._literals else '{}'
+            for comp in path.split('/')
+        )
+
+    def _find_path(self, components):
+        node = self._path_index.match(components)
+        if not node:
+            return None
+        info = self._specs['paths'][node.template]
+        return PathMatch(
+            node.template,
+            frozenset(method for method in HTTP_METHODS if method in info),
+        )
+
+    def _get_path(self, path):
+        match = self._match_path(self._normalize_path(path))
+        return match.template if match else None
 
     def _get_info(self, path):
         p = self._get_path(path)
-        return self._specs['paths'][p] if p else None
+        return self._get_section('paths', p) if p else None
+
+    def _get_section(self, *keys):
+        section = self._specs
+        if self._lean:
+            if self._help_sections is None:
+                # Load the full specifications only once, the first time help
+                # needs them, and keep the sections it uses but the components.
+                specs = self._load()
+                self._help_sections = {'info': specs['info'], 'paths': specs['paths']}
+            section = self._help_sections
+        for key in keys:
+            section = section[key]
+        return section
+
+    def _get_validator(self, method, path, direction, status_code):
+        if self._lean:
+            raise ValueError('Specifications loaded in lean mode cannot validate calls.')
+        p = self._get_path(path)
+        if not p:
+            return None
+        key = (p, method.lower(), direction, status_code)
+        if key not in self._validators:
+            self._validators[key] = self._compile_validator(*key)
+        return self._validators[key]
+
+    def _compile_validator(self, path, method, direction, status_code):
+        operation = self._specs['paths'][path].get(method)
+        if not operation:
+            return None
+        compiler = self._compilers.get(direction)
+        if compiler is None:
+            compiler = self._compilers[direction] = SchemaCompiler(self._specs, direction)
+
+        if direction == 'request':
+            body = operation.get('requestBody')
+        else:
+            responses = operation.get('responses', {})
+            body = None
+            for key in (str(status_code), status_code, f'{status_code // 100}XX', 'default'):
+                if key in responses:
+                    body = responses[key]
+                    break
+        if not body:
+            return None
+        content = compiler.resolve(body).get('content', {})
+        media_type = content.get('application/json')
+        if not media_type or 'schema' not in media_type:
+            return None
+        return compiler.compile(media_type['schema'])
+
+    def _get_collection_summaries(self, node):
+        for np in node.paths:
+            info = self._specs['paths'][np]
+            method_info = info['get'] if 'get' in info else info['post']
+            if not self._is_action(method_info['operationId']):
+                yield info['summary'] if 'summary' in info else ''
 
     def _is_action(self, operation_id):
         op_id_cmps = operation_id.rsplit('_', 2)
         return op_id_cmps[-2] not in ('list', 'retrieve')
 
     def _is_collection(self, path):
-        path_length = len(path[1:].split('/'))
-        for p in self._specs['paths'].keys():
-            comp = p[1:].split('/')
-            if not p.startswith(path):
+        node = self._resource_tree.find(path)
+        return node.is_collection if node else False
+
+
+class SpecsRegistry:
+    """
+    Share the parsed OpenAPI specifications between all the clients of a process.
+
+    The specifications are loaded once per location and mode (lean or full),
+    the first time they are requested, and are reused until they are explicitly refreshed.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._location_locks = {}
+        self._specs = {}
+        self._futures = {}
+        self._executor = None
+
+    def get(self, location, cache=None, lean=False):
+        """
+        Returns the specifications available at ``location`` loading them if needed.
+
+        :param location: The OpenAPI specification local path or URL.
+        :type location: str
+        :param cache: The on disk cache used to load the specifications, defaults to None
+        :type cache: SpecsCache, optional
+        :param lean: Load the specifications in lean mode, defaults to False
+        :type lean: bool, optional
+        :return: The shared specifications.
+        :rtype: OpenAPISpecs
+        """
+        key = (location, lean)
+        specs = self._specs.get(key)
+        if specs is not None:
+            return specs
+        with self._get_location_lock(key):
+            specs = self._specs.get(key)
+            if specs is None:
+                specs = OpenAPISpecs(location, cache=cache, lean=lean)
+                self._specs[key] = specs
+            return specs
+
+    async def aget(self, location, cache=None, lean=False):
+        """
+        Returns the specifications available at ``location`` loading them,
+        if needed, without blocking the running event loop.
+
+        :param location: The OpenAPI specification local path or URL.
+        :type location: str
+        :param cache: The on disk cache used to load the specifications, defaults to None
+        :type cache: SpecsCache, optional
+        :param lean: Load the specifications in lean mode, defaults to False
+        :type lean: bool, optional
+        :return: The shared specifications.
+        :rtype: OpenAPISpecs
+        """
+        key = (location, lean)
+        specs = self._specs.get(key)
+        if specs is not None:
+            return specs
+        specs = await OpenAPISpecs.aload(location, cache=cache, lean=lean)
+        with self._lock:
+            return self._specs.setdefault(key, specs)
+
+    def submit(self, location, cache=None, lean=False):
+        """
+        Start loading the specifications available at ``location`` in a background thread.
+        Concurrent submissions for the same location share the same load.
+
+        :param location: The OpenAPI specification local path or URL.
+        :type location: str
+        :param cache: The on disk cache used to load the specifications, defaults to None
+        :type cache: SpecsCache, optional
+        :param lean: Load the specifications in lean mode, defaults to False
+        :type lean: bool, optional
+        :return: A future that resolves to the shared specifications.
+        :rtype: concurrent.futures.Future
+        """
+        key = (location, lean)
+        with self._lock:
+            specs = self._specs.get(key)
+            if specs is not None:
+                future = Future()
+                future.set_result(specs)
+                return future
+            future = self._futures.get(key)
+            if future is None or future.done():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(thread_name_prefix='connect-specs')
+                future = self._executor.submit(self.get, location, cache, lean)
+                self._futures[key] = future
+                future.add_done_callback(partial(self._discard_future, key))
+            return future
+
+    def refresh(self, location, cache=None, lean=False):
+        """
+        Reload the specifications available at ``location``.
+        Clients that already hold the previous specifications keep using them.
+
+        :param location: The OpenAPI specification local path or URL.
+        :type location: str
+        :param cache: The on disk cache used to load the specifications, defaults to None
+        :type cache: SpecsCache, optional
+        :param lean: Load the specifications in lean mode, defaults to False
+        :type lean: bool, optional
+        :return: The reloaded specifications.
+        :rtype: OpenAPISpecs
+        """
+        key = (location, lean)
+        with self._get_location_lock(key):
+            specs = OpenAPISpecs(location, cache=cache, lean=lean)
+            self._specs[key] = specs
+            return specs
+
+    def clear(self):
+        """
+        Discard all the loaded specifications.
+        """
+        with self._lock:
+            self._specs.clear()
+
+    def _discard_future(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def _get_location_lock(self, key):
+        with self._lock:
+            return self._location_locks.setdefault(key, threading.Lock())
+
+
+specs_registry = SpecsRegistry()
+
+
+async def _aload_from_url(loop, location, cache):
+    entry = None
+    if cache:
+        entry = await loop.run_in_executor(None, cache.get, location)
+        if entry and cache.is_fresh(entry):
+            return entry['specs']
+
+    headers = cache.get_validators(entry) if entry else {}
+    try:
+        async with httpx.AsyncClient() as client:
+            async with client.stream('GET', location, headers=headers) as res:
+                content = b''.join([chunk async for chunk in res.aiter_bytes()])
+    except httpx.HTTPError:
+        if entry:
+            return entry['specs']
+        raise
+
+    if res.status_code == 304 and entry:
+        await loop.run_in_executor(None, cache.touch, location, entry)
+        return entry['specs']
+    if res.status_code >= 500 and entry:
+        return entry['specs']
+
+    res.raise_for_status()
+    specs = await loop.run_in_executor(None, parse_specs, content.decode('utf-8'))
+    if cache:
+        await loop.run_in_executor(
+            None,
+            partial(
+                cache.set,
+                location,
+                specs,
+                etag=res.headers.get('ETag'),
+                last_modified=res.headers.get('Last-Modified'),
+            ),
+        )
+    return specs
+
+
+def parse_specs(content):
+    """
+    Parse an OpenAPI specification in either JSON or YAML format.
+    YAML is parsed using the libyaml bindings if available.
+
+    :param content: The specification.
+    :type content: str
+    :return: The parsed specification.
+    :rtype: dict
+    """
+    if content.lstrip().startswith('{'):
+        return json.loads(content)
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def lean_specs(specs):
+    """
+    Returns a copy of an OpenAPI specification that only contains the data
+    needed to route and validate calls and to list the available resources:
+    paths, methods, operation ids, path summaries and tags.
+
+    :param specs: The parsed specification.
+    :type specs: dict
+    :return: The lean specification.
+    :rtype: dict
+    """
+    paths = {}
+    for path, path_info in specs['paths'].items():
+        lean = {}
+        if path_info.get('summary'):
+            lean['summary'] = path_info['summary']
+        for method in HTTP_METHODS:
+            if method not in path_info:
                 continue
-            if p == path:
-                return True
-            if len(comp) > path_length and comp[path_length].startswith('{'):
-                return True
-        return False
+            lean[method] = {'operationId': path_info[method].get('operationId')}
+        paths[path] = lean
+
+    info = specs.get('info', {})
+    return {
+        'openapi': specs.get('openapi'),
+        'info': {'title': info.get('title'), 'version': info.get('version')},
+        'tags': specs.get('tags', []),
+        'paths': paths,
+    }
+
+
+def compile_specs(specs):
+    """
+    Returns a minimized version of an OpenAPI specification that only contains
+    what the client needs: paths, methods, operation ids, summaries,
+    descriptions and query parameters.
+
+    :param specs: The parsed specification.
+    :type specs: dict
+    :return: The minimized specification.
+    :rtype: dict
+    """
+    def _compile_info(info, keys):
+        return {key: info[key] for key in keys if key in info}
+
+    def _compile_parameter(parameter):
+        if '$ref' in parameter:
+            return {'$ref': parameter['$ref']}
+        return _compile_info(parameter, ('name', 'description'))
+
+    paths = {}
+    for path, path_info in specs['paths'].items():
+        compiled = _compile_info(path_info, ('summary', 'description'))
+        for method in HTTP_METHODS:
+            if method not in path_info:
+                continue
+            method_info = path_info[method]
+            compiled[method] = _compile_info(
+                method_info,
+                ('operationId', 'summary', 'description'),
+            )
+            if 'parameters' in method_info:
+                compiled[method]['parameters'] = [
+                    _compile_parameter(parameter)
+                    for parameter in method_info['parameters']
+                ]
+        paths[path] = compiled
+
+    return {
+        'openapi': specs.get('openapi'),
+        'info': _compile_info(specs.get('info', {}), ('title', 'description', 'version')),
+        'tags': specs.get('tags', []),
+        'paths': paths,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compile an OpenAPI specification into a minimized JSON index.',
+    )
+    parser.add_argument('source', help='The YAML or JSON specification.')
+    parser.add_argument('destination', help='The compiled JSON specification.')
+    args = parser.parse_args(argv)
+
+    with open(args.source, 'r', encoding='utf-8') as f:
+        specs = parse_specs(f.read())
+    with open(args.destination, 'w', encoding='utf-8') as f:
+        json.dump(compile_specs(specs), f, separators=(',', ':'), default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#
+# This file is part of the Ingram Micro CloudBlue Connect Python OpenAPI Client.
+#
+# Copyright (c) 2021 Ingram Micro. All Rights Reserved.
+#
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter.
+
+    A RateLimiter instance can be shared by many clients, threads and coroutines:
+    it never blocks, it just reserves a slot and returns how long the caller has to
+    wait before issuing its call.
+    """
+    def __init__(self, rate, burst=None):
+        """
+        Create a new RateLimiter.
+
+        :param rate: Number of calls allowed per second.
+        :type rate: float
+        :param burst: Maximum number of calls that can be issued at once,
+                      defaults to ``rate`` (at least 1)
+        :type burst: int, optional
+        """
+        if rate <= 0:
+            raise ValueError('`rate` must be a positive, non-zero number.')
+
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Reserve a slot for a call.
+
+        :return: The number of seconds to wait before issuing the call.
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated) * self.rate,
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
@@ -0,0 +1,205 @@
+#
+# This file is part of the Ingram Micro CloudBlue Connect Python OpenAPI Client.
+#
+# Copyright (c) 2021 Ingram Micro. All Rights Reserved.
+#
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+import requests
+
+from urllib3.exceptions import NewConnectionError
+
+
+DEFAULT_RETRY_STATUSES = frozenset((429, *range(500, 600)))
+DEFAULT_RETRY_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    httpx.NetworkError,
+    httpx.TimeoutException,
+)
+DEFAULT_IDEMPOTENT_METHODS = frozenset(('get', 'head', 'options', 'delete'))
+
+
+class RetryPolicy:
+    """
+    Describe when and how a failed http call must be retried.
+
+    The same policy is used by both the synchronous and the asynchronous
+    client, it only computes whether a call must be retried and how long
+    to wait before retrying: the client is in charge of sleeping.
+    """
+    def __init__(
+        self,
+        max_retries=0,
+        backoff_factor=1.0,
+        max_backoff=60.0,
+        jitter=True,
+        retry_budget=None,
+        statuses=DEFAULT_RETRY_STATUSES,
+        exceptions=DEFAULT_RETRY_EXCEPTIONS,
+        respect_retry_after=True,
+        idempotent_methods=DEFAULT_IDEMPOTENT_METHODS,
+    ):
+        """
+        Create a new RetryPolicy.
+
+        :param max_retries: Maximum number of retries for a single call, defaults to 0
+        :type max_retries: int, optional
+        :param backoff_factor: Base delay in seconds, doubled at each retry, defaults to 1.0
+        :type backoff_factor: float, optional
+        :param max_backoff: Maximum delay in seconds between two retries, defaults to 60.0
+        :type max_backoff: float, optional
+        :param jitter: Randomize delays to avoid retry storms, defaults to True
+        :type jitter: bool, optional
+        :param retry_budget: Maximum number of seconds a single call can spend
+                             waiting between retries, defaults to None (unlimited)
+        :type retry_budget: float, optional
+        :param statuses: Http status codes that must be retried, defaults to 429 and 5xx
+        :type statuses: Iterable[int], optional
+        :param exceptions: Exceptions that must be retried, defaults to connection
+                           errors and timeouts
+        :type exceptions: tuple, optional
+        :param respect_retry_after: Wait for the delay requested by the server
+                                    through the ``Retry-After`` header (up to ``max_backoff``
+                                    seconds), defaults to True
+        :type respect_retry_after: bool, optional
+        :param idempotent_methods: Http methods that can be retried after any of ``exceptions``,
+                                   other methods are retried only if the connection
+                                   could not be established, defaults to GET, HEAD,
+                                   OPTIONS and DELETE.
+        :type idempotent_methods: Iterable[str], optional
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_budget = retry_budget
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.respect_retry_after = respect_retry_after
+        self.idempotent_methods = frozenset(method.lower() for method in idempotent_methods)
+
+    def start(self, method=None):
+        """
+        Returns a new RetryState to track the retries of a single call.
+
+        :param method: The http method of the call, defaults to None
+                       (the call is considered idempotent).
+        :type method: str, optional
+        :return: The retry state of a call.
+        :rtype: RetryState
+        """
+        return RetryState(self, method)
+
+    def is_retryable_response(self, response):
+        return response.status_code in self.statuses
+
+    def is_retryable_exception(self, exception, method=None):
+        if not isinstance(exception, self.exceptions):
+            return False
+        if method is None or method.lower() in self.idempotent_methods:
+            return True
+        # The request of a non idempotent call could have been processed
+        # by the server, so retry it only if it has never been sent.
+        return is_connect_error(exception)
+
+    def get_backoff(self, attempt):
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+    def get_retry_after(self, response):
+        if not self.respect_retry_after:
+            return None
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            return None
+        return min(delay, self.max_backoff)
+
+
+class RetryState:
+    """
+    Track the retries of a single http call.
+    """
+    def __init__(self, policy, method=None):
+        self._policy = policy
+        self._method = method
+        self.attempt = 0
+        self.waited = 0.0
+
+    def next_delay(self, response=None, exception=None):
+        """
+        Returns the number of seconds to wait before retrying
+        or None if the call must not be retried.
+
+        :param response: The response of the call, defaults to None
+        :param exception: The exception raised by the call, defaults to None
+        :return: The number of seconds to wait or None.
+        :rtype: float, None
+        """
+        if exception is not None:
+            retryable = self._policy.is_retryable_exception(exception, self._method)
+        else:
+            retryable = self._policy.is_retryable_response(response)
+
+        if not retryable or self.attempt >= self._policy.max_retries:
+            return None
+
+        delay = None
+        if response is not None:
+            delay = self._policy.get_retry_after(response)
+        if delay is None:
+            delay = self._policy.get_backoff(self.attempt + 1)
+        if (
+            self._policy.retry_budget is not None
+            and self.waited + delay > self._policy.retry_budget
+        ):
+            return None
+
+        self.attempt += 1
+        self.waited += delay
+        return delay
+
+
+def is_connect_error(exception):
+    """
+    Returns True if ``exception`` has been raised because the connection
+    to the server could not be established, so the request has not been sent.
+
+    :param exception: The exception raised by a http call.
+    :type exception: Exception
+    :return: True if the connection could not be established.
+    :rtype: bool
+    """
+    if isinstance(exception, (requests.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    if isinstance(exception, requests.ConnectionError) and exception.args:
+        return isinstance(getattr(exception.args[0], 'reason', None), NewConnectionError)
+    return False
+
+
+def parse_retry_after(value):
+    """
+    Parse the value of a ``Retry-After`` header.
+
+    :param value: The header value, either a number of seconds or an http date.
+    :type value: str, None
+    :return: The number of seconds to wait or None if the value is missing or invalid.
+    :rtype: float, None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
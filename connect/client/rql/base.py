@@ -3,6 +3,9 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
+from itertools import count
+
+from connect.client.rql.optimizer import MATCH_ALL, simplify
 from connect.client.rql.utils import parse_kwargs, to_rql_value
 
 
@@ -14,6 +17,8 @@ EMPTY = 'empty'
 
 KEYWORDS = (*COMP, *SEARCH, *LIST, NULL, EMPTY)
 
+_generations = count(1)
+
 
 class RQLQuery:
     """
@@ -23,6 +28,12 @@ class RQLQuery:
     OR = 'or'
     EXPR = 'expr'
 
+    # Serialized strings, hashes and optimized queries are cached on each node together with the
+    # generation they have been computed at. Mutating a node that belongs to
+    # another query moves to a new generation so the values cached by its
+    # ancestors are not used anymore.
+    _generation = 0
+
     def __init__(self, *, _op=EXPR, _children=None, _negated=False, _expr=None, **kwargs):
         """
         Create a new R object.
@@ -67,6 +78,11 @@ class RQLQuery:
 
             rql = R().nested.field.eq('value')
         """
+        self._str = None
+        self._hash = None
+        self._optimized = None
+        self._index = None
+        self._composed = False
         self.op = _op
         self.children = _children or []
         self.negated = _negated
@@ -80,6 +96,8 @@ class RQLQuery:
             self.op = self.AND
             for token in parse_kwargs(kwargs):
                 self.children.append(RQLQuery(_expr=token))
+        for child in self.children:
+            child._composed = True
 
     def __len__(self):
         """
@@ -115,12 +133,15 @@ class RQLQuery:
         :return: True if the ``other`` object is equal to self, False otherwise.
         :rtype: bool
         """
-        return (
-            self.op == other.op
-            and self.children == other.children
-            and self.negated == other.negated
-            and self.expr == other.expr
-        )
+        if (
+            self.op != other.op
+            or self.negated != other.negated
+            or self.expr != other.expr
+            or len(self.children) != len(other.children)
+            or hash(self) != hash(other)
+        ):
+            return False
+        return self.children == other.children
 
     def __hash__(self):
         """
@@ -129,8 +150,13 @@ class RQLQuery:
         :return: The hash of this object.
         :rtype: int
         """
-        return hash(
-            (self.op, self.expr, self.negated, *(hash(value) for value in self.children)),
+        cached = self._hash
+        if cached is not None and cached[0] == RQLQuery._generation:
+            return cached[1]
+        return self._reduce(
+            '_hash',
+            lambda node: node.children,
+            lambda node, values: hash((node.op, node.expr, node.negated, *values)),
         )
 
     def __repr__(self):
@@ -171,6 +197,64 @@ class RQLQuery:
         query._append(self)
         return query
 
+    def optimize(self):
+        """
+        Returns an R object equivalent to this one but simplified:
+        nested ``and``/``or`` are flattened, duplicated expressions and double
+        negations are removed, ``eq``/``in`` lookups on the same field combined
+        with ``or`` are merged and the contradictory queries are detected.
+
+        Ex.
+
+        .. code-block:: python
+
+            (R(status='active') & (R(id='PR-1') | R(id='PR-2'))).optimize()
+
+        is serialized as ``and(eq(status,active),in(id,(PR-1,PR-2)))``.
+
+        The returned R object is shared with subsequent calls and must not be modified.
+
+        :return: The simplified R object, an empty R object if it matches all the
+                 resources or None if it doesn't match any resource.
+        :rtype: R, None
+        """
+        # ``~`` keeps the expression of the negated R object but its child
+        # is the actual operand, so simplify it to drop double negations.
+        query = self._reduce(
+            '_optimized',
+            lambda node: node.children if node.negated or not node.expr else (),
+            simplify,
+        )
+        return type(self)() if query is MATCH_ALL else query
+
+    @classmethod
+    def any_of(cls, queries):
+        """
+        Combine all the R objects of ``queries`` using a logical ``or``.
+        It is equivalent to joining them with the ``|`` operator but
+        it doesn't create an intermediate R object for each of them.
+
+        :param queries: The R objects to combine.
+        :type queries: Iterable[R]
+        :return: The R object representing a logical ``or`` between ``queries``.
+        :rtype: R
+        """
+        return cls._combine(queries, cls.OR)
+
+    @classmethod
+    def all_of(cls, queries):
+        """
+        Combine all the R objects of ``queries`` using a logical ``and``.
+        It is equivalent to joining them with the ``&`` operator but
+        it doesn't create an intermediate R object for each of them.
+
+        :param queries: The R objects to combine.
+        :type queries: Iterable[R]
+        :return: The R object representing a logical ``and`` between ``queries``.
+        :rtype: R
+        """
+        return cls._combine(queries, cls.AND)
+
     def __getattr__(self, name):
         return self.n(name)
 
@@ -230,43 +314,71 @@ class RQLQuery:
         self._field = '.'.join(self._path)
         value = to_rql_value(op, value)
         self.expr = f'{op}({self._field},{value})'
+        self._changed()
         return self
 
     def _list(self, op, value):
         self._field = '.'.join(self._path)
         value = to_rql_value(op, value)
         self.expr = f'{op}({self._field},({value}))'
+        self._changed()
         return self
 
     def _bool(self, expr, value):
         self._field = '.'.join(self._path)
         if bool(value) is False:
             self.expr = f'ne({self._field},{expr}())'
-            return self
-        self.expr = f'eq({self._field},{expr}())'
+        else:
+            self.expr = f'eq({self._field},{expr}())'
+        self._changed()
         return self
 
+    def _changed(self):
+        self._str = None
+        self._hash = None
+        self._optimized = None
+        if self._composed:
+            RQLQuery._generation = next(_generations)
+
     def _to_string(self, query):
-        tokens = []
-        if query.expr:
-            if query.negated:
-                return f'not({query.expr})'
-            return query.expr
-        for c in query.children:
-            if c.expr:
-                if c.negated:
-                    tokens.append(f'not({c.expr})')
-                else:
-                    tokens.append(c.expr)
-                continue
-            tokens.append(self._to_string(c))
+        return query._reduce(
+            '_str',
+            lambda node: () if node.expr else node.children,
+            self._serialize,
+        )
 
+    def _serialize(self, node, tokens):
+        if node.expr:
+            return f'not({node.expr})' if node.negated else node.expr
         if not tokens:
             return ''
-
-        if query.negated:
-            return f'not({query.op}({",".join(tokens)}))'
-        return f'{query.op}({",".join(tokens)})'
+        if node.negated:
+            return f'not({node.op}({",".join(tokens)}))'
+        return f'{node.op}({",".join(tokens)})'
+
+    def _reduce(self, attr, get_children, reducer):
+        generation = RQLQuery._generation
+        # Visit the tree in post-order using an explicit stack so that
+        # deeply nested queries do not hit the recursion limit.
+        stack = [(self, False)]
+        values = []
+        while stack:
+            node, expanded = stack.pop()
+            cache = node.__dict__[attr]
+            if cache is not None and cache[0] == generation:
+                values.append(cache[1])
+                continue
+            children = get_children(node)
+            if children and not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+            start = len(values) - len(children)
+            value = reducer(node, values[start:])
+            del values[start:]
+            node.__dict__[attr] = (generation, value)
+            values.append(value)
+        return values[0]
 
     def _copy(self, other):
         return RQLQuery(
@@ -289,18 +401,67 @@ class RQLQuery:
         return query
 
     def _append(self, other):
-        if other in self.children:
-            return other
-
+        if self.children:
+            index = self._get_index()
+            if any(child == other for child in index.get(hash(other), ())):
+                return other
+        else:
+            index = None
+
+        self._changed()
         if (
             (other.op == self.op or (len(other) == 1 and other.op != self.EXPR))
             and not other.negated
         ):
+            index = self._merge_index(index, other)
             self.children.extend(other.children)
-            return self
-
-        self.children.append(other)
+        else:
+            if index is None:
+                index = {}
+            self._add_to_index(index, other)
+            other._composed = True
+            self.children.append(other)
+
+        self._index = (RQLQuery._generation, len(self.children), index)
         return self
 
+    def _merge_index(self, index, other):
+        # The children of ``other`` are adopted as they are, so is their index.
+        if index is None:
+            return dict(other._get_index())
+        for child in other.children:
+            self._add_to_index(index, child)
+        return index
+
+    def _get_index(self):
+        # Children grouped by hash, used to check whether an R object
+        # is already a child of this one without scanning all the children.
+        cached = self._index
+        if (
+            cached is not None
+            and cached[0] == RQLQuery._generation
+            and cached[1] == len(self.children)
+        ):
+            return cached[2]
+        index = {}
+        for child in self.children:
+            self._add_to_index(index, child)
+        self._index = (RQLQuery._generation, len(self.children), index)
+        return index
+
+    def _add_to_index(self, index, child):
+        key = hash(child)
+        index[key] = index.get(key, ()) + (child,)
+
+    @classmethod
+    def _combine(cls, queries, op):
+        query = cls(_op=op)
+        for other in queries:
+            if other:
+                query._append(other)
+        if len(query.children) == 1:
+            return query.children[0]
+        return query
+
 
 R = RQLQuery
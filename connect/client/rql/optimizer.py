@@ -0,0 +1,158 @@
+#
+# This file is part of the Ingram Micro CloudBlue Connect Python OpenAPI Client.
+#
+# Copyright (c) 2021 Ingram Micro. All Rights Reserved.
+#
+import re
+
+
+_EQ = re.compile(r'^eq\(([^,()]+),([^,()]*)\)$')
+_IN = re.compile(r'^in\(([^,()]+),\(([^()]*)\)\)$')
+
+# Returned for the queries that provably match all the resources, like the
+# negation of a query that matches nothing. Unlike an empty R object, which is
+# ignored by the logical operators, it makes an enclosing ``or`` match all the
+# resources.
+MATCH_ALL = object()
+
+
+def simplify(node, children):
+    """
+    Simplify an R object given its already simplified children.
+
+    Nested logical operators of the same kind are flattened, duplicated
+    expressions are removed, double negations are dropped and ``eq``/``in``
+    expressions on the same field combined with ``or`` are merged. Empty R
+    objects are ignored like the ``&`` and ``|`` operators do.
+
+    Only the queries that contain a contradiction (``x & ~x``) or an empty
+    ``in`` lookup are considered as matching no resources: lookups on the
+    same field combined with ``and`` are left to the server since they can
+    match multi-valued fields or values written in different ways.
+
+    :param node: The R object to simplify.
+    :type node: R
+    :param children: The simplified children of ``node``.
+    :type children: list
+    :return: The simplified R object, an empty R object if ``node`` doesn't filter
+             anything, ``MATCH_ALL`` if ``node`` provably matches all the resources
+             or None if ``node`` provably matches no resources.
+    :rtype: R, object, None
+    """
+    cls = type(node)
+    if node.expr and not children:
+        query = cls(_expr=node.expr)
+        parsed = _parse_values(query)
+        if parsed and not parsed[1]:
+            query = None
+    elif node.op == cls.OR:
+        query = _simplify_or(cls, children)
+    else:
+        query = _simplify_and(cls, children)
+
+    if node.negated:
+        return _negate(cls, query)
+    return query
+
+
+def _simplify_and(cls, children):
+    if any(child is None for child in children):
+        return None
+
+    terms = _flatten(cls.AND, [child for child in children if child is not MATCH_ALL])
+    if not terms and any(child is MATCH_ALL for child in children):
+        return MATCH_ALL
+    strings = {str(term) for term in terms}
+    for term in terms:
+        if term.negated and str(_negate(cls, term)) in strings:
+            return None
+
+    return _build(cls, cls.AND, terms)
+
+
+def _simplify_or(cls, children):
+    if any(child is MATCH_ALL for child in children):
+        return MATCH_ALL
+    if children and all(child is None for child in children):
+        return None
+
+    terms = _merge(
+        cls,
+        _flatten(cls.OR, [child for child in children if child is not None]),
+    )
+    return _build(cls, cls.OR, terms)
+
+
+def _negate(cls, query):
+    if query is None:
+        return MATCH_ALL
+    if query is MATCH_ALL:
+        return None
+    if not query:
+        return query
+    return cls(
+        _op=query.op,
+        _children=list(query.children),
+        _expr=query.expr,
+        _negated=not query.negated,
+    )
+
+
+def _flatten(op, children):
+    terms = {}
+    for child in children:
+        if not child:
+            continue
+        if child.op == op and not child.negated and not child.expr:
+            for term in child.children:
+                terms.setdefault(str(term), term)
+        else:
+            terms.setdefault(str(child), child)
+    return list(terms.values())
+
+
+def _parse_values(term):
+    if term.negated or not term.expr:
+        return None
+    match = _EQ.match(term.expr)
+    if match:
+        return match.group(1), [match.group(2)]
+    match = _IN.match(term.expr)
+    if match:
+        values = match.group(2)
+        return match.group(1), values.split(',') if values else []
+    return None
+
+
+def _merge(cls, terms):
+    # Lookups on the same field are merged into the position of the first one.
+    fields = {}
+    merged = []
+    for term in terms:
+        parsed = _parse_values(term)
+        if not parsed:
+            merged.append(term)
+            continue
+        field, values = parsed
+        if field not in fields:
+            fields[field] = (len(merged), {})
+            merged.append(None)
+        fields[field][1].update(dict.fromkeys(values))
+
+    for field, (idx, values) in fields.items():
+        merged[idx] = _lookup(cls, field, list(values))
+    return merged
+
+
+def _lookup(cls, field, values):
+    if len(values) == 1:
+        return cls(_expr=f'eq({field},{values[0]})')
+    return cls(_expr=f'in({field},({",".join(values)}))')
+
+
+def _build(cls, op, terms):
+    if not terms:
+        return cls()
+    if len(terms) == 1:
+        return terms[0]
+    return cls(_op=op, _children=terms)
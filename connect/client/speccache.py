@@ -0,0 +1,127 @@
+#
+# This file is part of the Ingram Micro CloudBlue Connect Python OpenAPI Client.
+#
+# Copyright (c) 2021 Ingram Micro. All Rights Reserved.
+#
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class SpecsCache:
+    """
+    Store parsed OpenAPI specifications on disk so that they
+    don't need to be downloaded and parsed each time a client is created.
+
+    Entries older than ``ttl`` seconds are revalidated against the server
+    using the ``ETag`` and ``Last-Modified`` headers of the original response.
+    If the server cannot be reached, a stale entry is used anyway.
+    """
+    def __init__(self, directory, ttl=3600):
+        """
+        Create a new SpecsCache.
+
+        :param directory: The directory where the specifications are stored,
+                          it is created if it doesn't exist.
+        :type directory: str
+        :param ttl: Number of seconds an entry is used without revalidating it, defaults to 3600
+        :type ttl: float, optional
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def get(self, location):
+        """
+        Returns the cached entry for ``location`` or None if there is no usable entry.
+
+        :param location: The location of the specifications.
+        :type location: str
+        :return: A dictionary with the ``specs``, ``etag``, ``last_modified``
+                 and ``fetched_at`` keys.
+        :rtype: dict, None
+        """
+        try:
+            with open(self._get_filename(location), 'rb') as f:
+                entry = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or 'specs' not in entry:
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def set(self, location, specs, etag=None, last_modified=None):
+        """
+        Store the specifications downloaded from ``location``.
+        Errors writing to the cache directory are ignored.
+
+        :param location: The location of the specifications.
+        :type location: str
+        :param specs: The parsed specifications.
+        :type specs: dict
+        :param etag: The ``ETag`` header of the response, defaults to None
+        :type etag: str, optional
+        :param last_modified: The ``Last-Modified`` header of the response, defaults to None
+        :type last_modified: str, optional
+        :return: The stored entry.
+        :rtype: dict
+        """
+        entry = {
+            'location': location,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'specs': specs,
+        }
+        self._write(location, entry)
+        return entry
+
+    def touch(self, location, entry):
+        """
+        Mark an entry as revalidated.
+
+        :param location: The location of the specifications.
+        :type location: str
+        :param entry: The entry returned by ``get``.
+        :type entry: dict
+        """
+        entry['fetched_at'] = time.time()
+        self._write(location, entry)
+
+    def get_validators(self, entry):
+        """
+        Returns the headers needed to issue a conditional request for ``entry``.
+
+        :param entry: The entry returned by ``get``.
+        :type entry: dict
+        :return: The conditional request headers.
+        :rtype: dict
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _get_filename(self, location):
+        digest = hashlib.sha256(location.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.json')
+
+    def _write(self, location, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, separators=(',', ':'), default=str)
+                os.replace(tmp, self._get_filename(location))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (OSError, TypeError, ValueError):
+            pass
@@ -3,13 +3,19 @@
 #
 # Copyright (c) 2021 Ingram Micro. All Rights Reserved.
 #
+import codecs
 import platform
+import re
 from collections import namedtuple
+from json import JSONDecodeError, JSONDecoder
 
 from connect.client.version import get_version
 
 ContentRange = namedtuple('ContentRange', ('first', 'last', 'count'))
 
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_TOKENS = re.compile(r'["\\\[\]{},]')
+
 
 def _get_user_agent():
     version = get_version()
@@ -47,3 +53,128 @@ def resolve_attribute(attr, data):
 
 def get_values(item, fields):
     return {field: resolve_attribute(field, item) for field in fields}
+
+
+class JSONArrayDecoder:
+    """
+    Incrementally decode the items of a JSON array
+    fed as a sequence of text chunks.
+
+    Each chunk is scanned once to find where items end, an item is decoded
+    only when it has been completely received.
+    """
+    def __init__(self):
+        self._decoder = JSONDecoder()
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self._finished = False
+        self._empty = True
+
+    def feed(self, chunk):
+        """
+        Add a chunk of text to the decoder.
+
+        :param chunk: the chunk of text to decode.
+        :type chunk: str
+        :return: The list of items completely decoded so far.
+        :rtype: list
+        """
+        items = []
+        start = self._start(chunk)
+        if start is None:
+            return items
+        # index of a character escaped by a backslash at the end of the previous chunk
+        skip = 0 if self._escaped else -1
+        for match in _JSON_TOKENS.finditer(chunk, start):
+            idx = match.start()
+            if idx == skip:
+                continue
+            if self._in_string:
+                skip = self._scan_string(match.group(), idx, skip)
+                continue
+            if self._is_item_end(match.group()):
+                items.extend(self._end_item(chunk, start, idx))
+                start = idx + 1
+                if self._finished:
+                    return items
+        self._escaped = skip == len(chunk)
+        self._parts.append(chunk[start:])
+        return items
+
+    def close(self):
+        """
+        Check that the whole array has been decoded.
+
+        :raises JSONDecodeError: if the array is incomplete or malformed.
+        """
+        if not self._finished:
+            raise JSONDecodeError('Unterminated JSON array', ''.join(self._parts), 0)
+
+    def _start(self, chunk):
+        if self._finished:
+            return None
+        if self._started:
+            return 0
+        pos = _WHITESPACE.match(chunk).end()
+        if pos == len(chunk):
+            return None
+        if chunk[pos] != '[':
+            raise JSONDecodeError('Expecting a JSON array', chunk, pos)
+        self._started = True
+        self._depth = 1
+        return pos + 1
+
+    def _scan_string(self, char, idx, skip):
+        if char == '\\':
+            return idx + 1
+        if char == '"':
+            self._in_string = False
+        return skip
+
+    def _is_item_end(self, char):
+        if char == '"':
+            self._in_string = True
+        elif char in '[{':
+            self._depth += 1
+        elif char in ']}':
+            self._depth -= 1
+            self._finished = self._depth == 0
+            return self._finished
+        else:
+            return self._depth == 1
+        return False
+
+    def _end_item(self, chunk, start, end):
+        self._parts.append(chunk[start:end])
+        text = ''.join(self._parts).strip()
+        self._parts = []
+        empty, self._empty = self._empty, False
+        if text:
+            return [self._decoder.decode(text)]
+        # Only an empty array has no value before its delimiter.
+        if self._finished and empty:
+            return []
+        raise JSONDecodeError('Expecting value', chunk, end)
+
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """
+    Returns an iterator over the items of a JSON array
+    fed as a sequence of binary chunks.
+
+    :param chunks: the chunks of the encoded JSON array.
+    :type chunks: Iterable[bytes]
+    :param encoding: the encoding of the chunks, defaults to utf-8.
+    :type encoding: str, optional
+    :return: An iterator over the items of the array.
+    :rtype: Iterator
+    """
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    decoder = JSONArrayDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(text_decoder.decode(chunk))
+    yield from decoder.feed(text_decoder.decode(b'', final=True))
+    decoder.close()
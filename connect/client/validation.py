@@ -0,0 +1,341 @@
+#
+# This file is part of the Ingram Micro CloudBlue Connect Python OpenAPI Client.
+#
+# Copyright (c) 2021 Ingram Micro. All Rights Reserved.
+#
+import operator
+import re
+
+
+_TYPES = {
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+    'array': (list, tuple),
+    'object': dict,
+}
+
+
+def _is_type(value, schema_type):
+    if isinstance(value, bool) and schema_type != 'boolean':
+        return False
+    if schema_type == 'integer' and isinstance(value, float):
+        # JSON doesn't tell 1 from 1.0, some encoders write integers as floats.
+        return value.is_integer()
+    return isinstance(value, _TYPES[schema_type])
+
+
+def _compile_bound(schema, keyword, exclusive_keyword, out_of_range, symbol):
+    bound = schema.get(keyword)
+    if bound is None:
+        return None
+    exclusive = schema.get(exclusive_keyword, False)
+    if not exclusive:
+        symbol += '='
+
+    def check(value, location, errors):
+        if out_of_range(value, bound) or (exclusive and value == bound):
+            errors.append(f'{location}: must be {symbol} {bound}')
+
+    return check
+
+
+def _check_items(items, value, location, errors):
+    for idx, item in enumerate(value):
+        items(item, f'{location}[{idx}]', errors)
+
+
+def _check_properties(properties, additional, value, location, errors):
+    for name, item in value.items():
+        validator = properties.get(name)
+        if validator is not None:
+            validator(item, f'{location}.{name}', errors)
+        elif additional is False:
+            errors.append(f'{location}.{name}: is not allowed')
+        elif additional is not True:
+            additional(item, f'{location}.{name}', errors)
+
+
+def _is_open(schema):
+    if schema.get('type', 'object' if 'properties' in schema else None) != 'object':
+        return False
+    return schema.get('additionalProperties') is not False
+
+
+def _matches(validator, value, location):
+    errors = []
+    validator(value, location, errors)
+    return not errors
+
+
+class SchemaCompiler:
+    """
+    Compile the schemas of an OpenAPI specification into validation functions.
+
+    Schemas are compiled once, ``$ref`` targets are compiled the first time
+    they are referenced and shared by all the schemas that reference them.
+    The compiler supports the subset of the OpenAPI 3.0 schema object
+    used to describe JSON payloads: types, ``nullable``, ``enum``, string length
+    and patterns, numeric ranges, array items, object properties, ``required``
+    and ``additionalProperties`` and the ``allOf``, ``anyOf`` and ``oneOf``
+    combinators with their ``discriminator``. Other keywords are ignored.
+
+    A value matching more than one schema of a ``oneOf`` is rejected only if none
+    of them is an object schema that allows additional properties: such schemas
+    cannot be told apart reliably without a ``discriminator``.
+    """
+    def __init__(self, specs, direction):
+        """
+        Create a new SchemaCompiler.
+
+        :param specs: The parsed specification.
+        :type specs: dict
+        :param direction: Either ``request`` or ``response``, ``readOnly`` properties
+                          are not required within requests and ``writeOnly`` properties
+                          are not required within responses.
+        :type direction: str
+        """
+        self._specs = specs
+        self._skip_required = 'readOnly' if direction == 'request' else 'writeOnly'
+        self._refs = {}
+
+    def compile(self, schema):
+        """
+        Returns a function that validates a value against ``schema``.
+
+        :param schema: The schema object.
+        :type schema: dict
+        :return: A function that takes a value and returns the list of validation errors.
+        :rtype: Callable
+        """
+        validator = self._compile(schema)
+
+        def validate(value):
+            errors = []
+            validator(value, '$', errors)
+            return errors
+
+        return validate
+
+    def resolve(self, obj):
+        """
+        Returns the object referenced by ``obj`` if it is a reference.
+
+        :param obj: An object of the specification.
+        :type obj: dict
+        :return: The referenced object.
+        :rtype: dict
+        """
+        while '$ref' in obj:
+            ref = obj['$ref']
+            if not ref.startswith('#/'):
+                raise ValueError(f'Unsupported reference `{ref}`.')
+            obj = self._specs
+            for component in ref[2:].split('/'):
+                obj = obj[component.replace('~1', '/').replace('~0', '~')]
+        return obj
+
+    def _compile_ref(self, ref):
+        if ref in self._refs:
+            return self._refs[ref]
+
+        compiled = []
+
+        def validate(value, location, errors):
+            compiled[0](value, location, errors)
+
+        self._refs[ref] = validate
+        compiled.append(self._compile(self.resolve({'$ref': ref})))
+        return validate
+
+    def _compile(self, schema):
+        if '$ref' in schema:
+            return self._compile_ref(schema['$ref'])
+
+        schema_type = schema.get('type')
+        nullable = schema.get('nullable', False)
+        checks = [
+            check for check in (
+                self._compile_enum(schema),
+                self._compile_string(schema),
+                self._compile_number(schema),
+                self._compile_array(schema),
+                self._compile_object(schema),
+                self._compile_all_of(schema),
+                self._compile_any_of(schema),
+            )
+            if check
+        ]
+
+        def validate(value, location, errors):
+            if value is None:
+                if schema_type and not nullable:
+                    errors.append(f'{location}: must not be null')
+                return
+            if schema_type in _TYPES and not _is_type(value, schema_type):
+                errors.append(f'{location}: must be of type {schema_type}')
+                return
+            for check in checks:
+                check(value, location, errors)
+
+        return validate
+
+    def _compile_enum(self, schema):
+        if 'enum' not in schema:
+            return None
+        enum = schema['enum']
+
+        def check(value, location, errors):
+            if value not in enum:
+                errors.append(f'{location}: must be one of {enum}')
+
+        return check
+
+    def _compile_string(self, schema):
+        min_length = schema.get('minLength')
+        max_length = schema.get('maxLength')
+        pattern = re.compile(schema['pattern']) if 'pattern' in schema else None
+        if min_length is None and max_length is None and pattern is None:
+            return None
+
+        def check(value, location, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(f'{location}: must be at least {min_length} characters long')
+            if max_length is not None and len(value) > max_length:
+                errors.append(f'{location}: must be at most {max_length} characters long')
+            if pattern is not None and not pattern.search(value):
+                errors.append(f'{location}: must match {pattern.pattern}')
+
+        return check
+
+    def _compile_number(self, schema):
+        bounds = [
+            bound for bound in (
+                _compile_bound(schema, 'minimum', 'exclusiveMinimum', operator.lt, '>'),
+                _compile_bound(schema, 'maximum', 'exclusiveMaximum', operator.gt, '<'),
+            )
+            if bound
+        ]
+        if not bounds:
+            return None
+
+        def check(value, location, errors):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return
+            for bound in bounds:
+                bound(value, location, errors)
+
+        return check
+
+    def _compile_array(self, schema):
+        items = self._compile(schema['items']) if 'items' in schema else None
+        min_items = schema.get('minItems')
+        max_items = schema.get('maxItems')
+        if items is None and min_items is None and max_items is None:
+            return None
+
+        def check(value, location, errors):
+            if not isinstance(value, (list, tuple)):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f'{location}: must contain at least {min_items} items')
+            if max_items is not None and len(value) > max_items:
+                errors.append(f'{location}: must contain at most {max_items} items')
+            if items is not None:
+                _check_items(items, value, location, errors)
+
+        return check
+
+    def _compile_object(self, schema):
+        raw_properties = schema.get('properties', {})
+        properties = {
+            name: self._compile(prop)
+            for name, prop in raw_properties.items()
+        }
+        required = [
+            name for name in schema.get('required', [])
+            if not raw_properties.get(name, {}).get(self._skip_required)
+        ]
+        additional = schema.get('additionalProperties', True)
+        if isinstance(additional, dict):
+            additional = self._compile(additional)
+        if not (properties or required or additional is not True):
+            return None
+
+        def check(value, location, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f'{location}.{name}: is required')
+            _check_properties(properties, additional, value, location, errors)
+
+        return check
+
+    def _compile_all_of(self, schema):
+        if 'allOf' not in schema:
+            return None
+        validators = [self._compile(sub) for sub in schema['allOf']]
+
+        def check(value, location, errors):
+            for validator in validators:
+                validator(value, location, errors)
+
+        return check
+
+    def _compile_any_of(self, schema):
+        if 'anyOf' not in schema and 'oneOf' not in schema:
+            return None
+        keyword = 'anyOf' if 'anyOf' in schema else 'oneOf'
+        branches = [
+            (self._compile(sub), _is_open(self.resolve(sub)))
+            for sub in schema[keyword]
+        ]
+        select = self._compile_discriminator(schema, schema[keyword], branches)
+
+        def check(value, location, errors):
+            matches = [
+                is_open for validator, is_open in select(value)
+                if _matches(validator, value, location)
+            ]
+            if keyword == 'oneOf' and (not matches or len(matches) > 1 and not any(matches)):
+                errors.append(f'{location}: must match exactly one schema of oneOf')
+            elif not matches:
+                errors.append(f'{location}: must match at least one schema of anyOf')
+
+        return check
+
+    def _compile_discriminator(self, schema, subs, branches):
+        if 'discriminator' not in schema:
+            return lambda value: branches
+        name = schema['discriminator']['propertyName']
+        mapping = schema['discriminator'].get('mapping', {})
+        selected = {}
+        for sub, branch in zip(subs, branches):
+            for key in self._get_discriminator_values(sub, name, mapping):
+                selected.setdefault(key, []).append(branch)
+
+        def select(value):
+            if not isinstance(value, dict) or name not in value:
+                return branches
+            return selected.get(value[name], [])
+
+        return select
+
+    def _get_discriminator_values(self, sub, name, mapping):
+        # Without an explicit mapping the value of the discriminator is either
+        # the name of the referenced schema or one of the values it allows.
+        if '$ref' in sub:
+            ref = sub['$ref']
+            keys = [
+                key for key, target in mapping.items()
+                if target == ref or ref.endswith(f'/{target}')
+            ]
+            if keys or mapping:
+                return keys
+            return [ref.rsplit('/', 1)[-1]]
+        prop = self.resolve(self.resolve(sub).get('properties', {}).get(name, {}))
+        return prop.get('enum', [])
@@ -1,8 +1,15 @@
+import asyncio
 import io
+from concurrent.futures import Future
+
+import httpx
 
 import pytest
 
-from connect.client import AsyncConnectClient, ClientError
+from pytest_httpx import to_response
+
+from connect.client import AsyncConnectClient, ClientError, RetryPolicy
+from connect.client.codec import JSONCodec
 from connect.client.logger import RequestLogger
 from connect.client.models import AsyncCollection, AsyncNS
 
@@ -107,6 +114,49 @@ async def test_execute(httpx_mock):
     assert 'User-Agent' in headers and headers['User-Agent'].startswith('connect-fluent')
 
     assert results == expected
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_execute_query_and_params(httpx_mock):
+    httpx_mock.add_response(method='GET', json=[])
+
+    c = AsyncConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    await c.get('resources?and(eq(a,1),gt(id,5))&ordering(id)', params={'limit': 10})
+
+    assert str(httpx_mock.get_requests()[0].url) == (
+        'https://localhost/resources?and(eq(a,1),gt(id,5))&ordering(id)&limit=10'
+    )
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_execute_concurrent_calls_use_their_response(async_mocker):
+    async def _request(method, url, **kwargs):
+        request = httpx.Request(method, url)
+        if url.endswith('slow'):
+            await asyncio.sleep(0.01)
+            raise httpx.ConnectError('reset', request=request)
+        return httpx.Response(
+            400,
+            json={'error_code': 'VAL_001', 'errors': ['fast']},
+            request=request,
+        )
+
+    c = AsyncConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+    c._session = async_mocker.MagicMock(request=_request)
+
+    slow, fast = await asyncio.gather(
+        c.get('slow'),
+        c.get('fast'),
+        return_exceptions=True,
+    )
+
+    assert fast.status_code == 400
+    assert fast.errors == ['fast']
+    assert slow.status_code is None
+    assert slow.errors is None
 
 
 @pytest.mark.asyncio
@@ -114,7 +164,7 @@ async def test_execute_validate_with_specs(async_mocker):
     mocked_specs = async_mocker.MagicMock()
     mocked_specs.exists.return_value = False
 
-    async_mocker.patch('connect.client.fluent.OpenAPISpecs', return_value=mocked_specs)
+    async_mocker.patch('connect.client.fluent.specs_registry.get', return_value=mocked_specs)
 
     c = AsyncConnectClient('API_KEY')
     with pytest.raises(ClientError) as cv:
@@ -138,6 +188,7 @@ async def test_execute_non_json_response(httpx_mock):
     )
     result = await c.execute('get', 'resources')
     assert result == b'This is a non json response.'
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -178,6 +229,7 @@ async def test_execute_retries(httpx_mock):
     assert 'User-Agent' in headers and headers['User-Agent'].startswith('connect-fluent')
 
     assert results == expected
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -207,6 +259,7 @@ async def test_execute_max_retries_exceeded(httpx_mock):
 
     with pytest.raises(ClientError):
         await c.execute('get', 'resources')
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -231,6 +284,7 @@ async def test_execute_default_headers(httpx_mock):
     assert 'Authorization' in headers and headers['Authorization'] == 'API_KEY'
     assert 'User-Agent' in headers and headers['User-Agent'].startswith('connect-fluent')
     assert 'X-Custom-Header' in headers and headers['X-Custom-Header'] == 'custom-header-value'
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -258,6 +312,7 @@ async def test_execute_with_kwargs(httpx_mock):
     assert 'Authorization' in headers and headers['Authorization'] == 'API_KEY'
     assert 'User-Agent' in headers and headers['User-Agent'].startswith('connect-fluent')
     assert 'X-Custom-Header' in headers and headers['X-Custom-Header'] == 'value'
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -282,6 +337,7 @@ async def test_execute_connect_error(httpx_mock):
     assert cv.value.status_code == 400
     assert cv.value.error_code == 'code'
     assert cv.value.errors == ['first', 'second']
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -304,6 +360,7 @@ async def test_execute_unexpected_connect_error(httpx_mock):
         await c.execute('post', 'resources')
 
     assert str(cv.value) == '400 Bad Request'
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -320,6 +377,7 @@ async def test_execute_uparseable_connect_error(httpx_mock):
 
     with pytest.raises(ClientError):
         await c.execute('post', 'resources')
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -337,6 +395,7 @@ async def test_execute_error_with_reason(httpx_mock, encoding):
 
     with pytest.raises(ClientError):
         await c.execute('post', 'resources')
+    await c.aclose()
 
 
 @pytest.mark.asyncio
@@ -354,6 +413,7 @@ async def test_execute_delete(httpx_mock):
     results = await c.execute('delete', 'resources')
 
     assert results is None
+    await c.aclose()
 
 
 def test_collection():
@@ -364,3 +424,309 @@ def test_collection():
 def test_ns():
     c = AsyncConnectClient('API_KEY', use_specs=False)
     assert isinstance(c.ns('namespace'), AsyncNS)
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/resources',
+        json=[],
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/resources',
+        json=[],
+    )
+
+    c = AsyncConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    await c.execute('get', 'resources')
+    session = c.session
+    await c.execute('get', 'resources')
+
+    assert c.session is session
+    assert len(httpx_mock.get_requests()) == 2
+    await c.aclose()
+
+
+def test_session_limits(mocker):
+    mocked_client = mocker.patch('connect.client.mixins.httpx.AsyncClient')
+    limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+
+    c = AsyncConnectClient('API_KEY', use_specs=False, limits=limits, http2=True)
+
+    assert c.session == mocked_client.return_value
+    mocked_client.assert_called_once_with(limits=limits, http2=True)
+
+
+@pytest.mark.asyncio
+async def test_aclose(async_mocker):
+    c = AsyncConnectClient('API_KEY', use_specs=False)
+    session = c.session
+    close_mock = async_mocker.patch.object(session, 'aclose', async_mocker.AsyncMock())
+
+    await c.aclose()
+
+    close_mock.assert_awaited_once()
+    assert c._session is None
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager(async_mocker):
+    async with AsyncConnectClient('API_KEY', use_specs=False) as c:
+        session = c.session
+        close_mock = async_mocker.patch.object(session, 'aclose', async_mocker.AsyncMock())
+
+    close_mock.assert_awaited_once()
+    assert c._session is None
+
+
+@pytest.mark.asyncio
+async def test_execute_retries_do_not_block(httpx_mock, async_mocker):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/resources',
+        status_code=503,
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/resources',
+        json=[],
+    )
+    mocked_sleep = async_mocker.patch(
+        'connect.client.mixins.asyncio.sleep',
+        async_mocker.AsyncMock(),
+    )
+
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        retry_policy=RetryPolicy(max_retries=1, jitter=False),
+    )
+
+    assert await c.execute('get', 'resources') == []
+    mocked_sleep.assert_awaited_once_with(1.0)
+    await c.aclose()
+
+
+def _raise_connect_error(request, extensions):
+    raise httpx.ConnectError('reset', request=request)
+
+
+@pytest.mark.asyncio
+async def test_execute_retries_exception(httpx_mock, async_mocker):
+    side_effects = [httpx.ConnectError('reset'), to_response(json=[])]
+
+    def _callback(request, extensions):
+        effect = side_effects.pop(0)
+        if isinstance(effect, Exception):
+            raise effect
+        return effect
+
+    httpx_mock.add_callback(
+        _callback,
+        method='GET',
+        url='https://localhost/resources',
+    )
+    async_mocker.patch('connect.client.mixins.asyncio.sleep', async_mocker.AsyncMock())
+
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        max_retries=1,
+    )
+
+    assert await c.execute('get', 'resources') == []
+    assert not side_effects
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_execute_exception_retries_exceeded(httpx_mock, async_mocker):
+    httpx_mock.add_callback(
+        _raise_connect_error,
+        method='GET',
+        url='https://localhost/resources',
+    )
+    async_mocker.patch('connect.client.mixins.asyncio.sleep', async_mocker.AsyncMock())
+
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+    )
+
+    with pytest.raises(ClientError):
+        await c.execute('get', 'resources')
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_execute_rate_limiter(httpx_mock, async_mocker):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/resources',
+        json=[],
+    )
+    mocked_sleep = async_mocker.patch(
+        'connect.client.mixins.asyncio.sleep',
+        async_mocker.AsyncMock(),
+    )
+    limiter = async_mocker.MagicMock()
+    limiter.reserve.return_value = 0.25
+
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        rate_limiter=limiter,
+    )
+
+    await c.execute('get', 'resources')
+
+    limiter.reserve.assert_called_once()
+    mocked_sleep.assert_awaited_once_with(0.25)
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_execute_json_codec(httpx_mock, async_mocker):
+    httpx_mock.add_response(
+        method='POST',
+        url='https://localhost/resources',
+        json={'id': 'ID'},
+        status_code=201,
+    )
+    codec = async_mocker.MagicMock(wraps=JSONCodec())
+
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        json_codec=codec,
+    )
+
+    result = await c.create('resources', payload={'name': 'name'})
+
+    assert result == {'id': 'ID'}
+    request = httpx_mock.get_requests()[0]
+    assert request.read() == b'{"name": "name"}'
+    assert request.headers['Content-Type'] == 'application/json'
+    codec.dumps.assert_called_once_with({'name': 'name'})
+    codec.loads.assert_called_once()
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_load_specs(async_mocker):
+    specs = async_mocker.MagicMock()
+    mocked_aget = async_mocker.patch(
+        'connect.client.fluent.specs_registry.aget',
+        new_callable=async_mocker.AsyncMock,
+        return_value=specs,
+    )
+    mocked_get = async_mocker.patch('connect.client.fluent.specs_registry.get')
+    c = AsyncConnectClient('API_KEY', specs_location='tests/data/specs.yml', specs_loading='lazy')
+
+    assert await c.load_specs() is specs
+    assert await c.load_specs() is specs
+    assert c.specs is specs
+    assert c._help_formatter._specs is specs
+    mocked_aget.assert_awaited_once_with('tests/data/specs.yml', cache=None, lean=False)
+    mocked_get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_load_specs_without_specs():
+    c = AsyncConnectClient('API_KEY', use_specs=False)
+
+    assert await c.load_specs() is None
+
+
+@pytest.mark.asyncio
+async def test_load_specs_background(async_mocker):
+    future = Future()
+    async_mocker.patch('connect.client.fluent.specs_registry.submit', return_value=future)
+    c = AsyncConnectClient('API_KEY', specs_loading='background')
+    specs = async_mocker.MagicMock()
+    future.set_result(specs)
+
+    assert await c.load_specs() is specs
+
+
+@pytest.mark.asyncio
+async def test_execute_lazy_specs(async_mocker):
+    specs = async_mocker.MagicMock()
+    specs.exists.return_value = False
+    mocked_aget = async_mocker.patch(
+        'connect.client.fluent.specs_registry.aget',
+        new_callable=async_mocker.AsyncMock,
+        return_value=specs,
+    )
+    c = AsyncConnectClient('API_KEY', specs_loading='lazy')
+
+    with pytest.raises(ClientError) as cv:
+        await c.execute('GET', 'resources')
+
+    assert str(cv.value) == 'The path `resources` does not exist.'
+    mocked_aget.assert_awaited_once()
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_validate_payloads(httpx_mock):
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_payloads=True,
+    )
+
+    with pytest.raises(ClientError) as cv:
+        await c.create('products', payload={'name': 'Product'})
+
+    assert str(cv.value) == 'Invalid payload for `POST products`: $.category: is required'
+    assert httpx_mock.get_requests() == []
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_validate_responses(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/products',
+        json=[{'id': 1}],
+    )
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_responses=True,
+    )
+
+    with pytest.raises(ClientError) as cv:
+        await c.get('products')
+
+    assert str(cv.value) == 'Invalid response for `GET products`: $[0].id: must be of type string'
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_validate_responses_valid(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/products',
+        json=[{'id': 'PRD-000'}],
+    )
+    c = AsyncConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_responses=True,
+    )
+
+    assert await c.get('products') == [{'id': 'PRD-000'}]
+    await c.aclose()
@@ -1,3 +1,6 @@
+import asyncio
+import re
+
 import pytest
 
 from connect.client.exceptions import ClientError
@@ -1079,3 +1082,289 @@ async def test_rs_iterate_already_evaluated(mocker, async_client_mock, async_rs_
     rs._client.get.return_value = expected
     assert [item async for item in rs] == expected
     assert [item async for item in rs] == expected
+
+
+def _paged_get(client, count):
+    async def _get(url, **kwargs):
+        offset = kwargs['params']['offset']
+        limit = kwargs['params']['limit']
+        return [{'id': i} for i in range(offset, min(offset + limit, count))]
+
+    client.response.headers = {'Content-Range': f'items 0-99/{count}'}
+    client.get.side_effect = _get
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('prefetch', (1, 2, 10))
+async def test_rs_iterate_prefetch(async_client_mock, async_rs_factory, prefetch):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _paged_get(rs._client, 350)
+
+    results = [item async for item in rs.prefetch(prefetch)]
+
+    assert results == [{'id': i} for i in range(350)]
+    offsets = [call[1]['params']['offset'] for call in rs._client.get.call_args_list]
+    assert sorted(offsets) == [0, 100, 200, 300]
+
+
+@pytest.mark.asyncio
+async def test_rs_values_list_prefetch(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _paged_get(rs._client, 150)
+
+    results = [item async for item in rs.prefetch(2).values_list('id')]
+
+    assert results == [{'id': i} for i in range(150)]
+
+
+@pytest.mark.asyncio
+async def test_rs_fetch_parallel(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _paged_get(rs._client, 350)
+
+    results = await rs.fetch_parallel(workers=3)
+
+    assert results == [{'id': i} for i in range(350)]
+    assert rs._results == results
+    offsets = [call[1]['params']['offset'] for call in rs._client.get.call_args_list]
+    assert sorted(offsets[1:]) == [0, 100, 200, 300]
+
+
+@pytest.mark.asyncio
+async def test_rs_fetch_parallel_values_list(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _paged_get(rs._client, 150)
+
+    results = await rs.values_list('id').fetch_parallel()
+
+    assert results == [{'id': i} for i in range(150)]
+
+
+@pytest.mark.asyncio
+async def test_rs_fetch_parallel_slice(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _paged_get(rs._client, 150)
+
+    results = await rs[10:20].fetch_parallel()
+
+    assert results == [{'id': i} for i in range(10, 20)]
+    rs._client.get.assert_awaited_once()
+
+
+def _batch_get(client, items):
+    async def _get(url, **kwargs):
+        match = re.search(r'in\(product\.id,\(([^)]*)\)\)', url)
+        values = match.group(1).split(',')
+        return [item for item in items if item['product']['id'] in values]
+
+    client.response.headers = {'Content-Range': 'items 0-1/2'}
+    client.get.side_effect = _get
+
+
+@pytest.mark.asyncio
+async def test_rs_filter_in_batches(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    items = [{'id': f'AS-{i}', 'product': {'id': f'PRD-{i}'}} for i in range(5)]
+    _batch_get(rs._client, items)
+
+    batches = rs.filter(status='active').filter_in_batches(
+        'product.id',
+        [f'PRD-{i}' for i in (0, 1, 1, 2, 3, 4)],
+        batch_size=2,
+    )
+    results = [item async for item in batches]
+
+    assert results == items
+    urls = sorted(call[0][0] for call in rs._client.get.call_args_list)
+    assert urls == [
+        'resources?and(eq(status,active),in(product.id,(PRD-0,PRD-1)))',
+        'resources?and(eq(status,active),in(product.id,(PRD-2,PRD-3)))',
+        'resources?and(eq(status,active),in(product.id,(PRD-4)))',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rs_filter_in_batches_deduplicate(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    items = [
+        {'id': 'AS-0', 'product': {'id': 'PRD-0'}},
+        {'id': 'AS-0', 'product': {'id': 'PRD-1'}},
+        {'id': 'AS-1', 'product': {'id': 'PRD-1'}},
+    ]
+    _batch_get(rs._client, items)
+
+    batches = rs.values_list('id').filter_in_batches('product.id', ['PRD-0', 'PRD-1'], batch_size=1)
+    results = [item async for item in batches]
+
+    assert results == [{'id': 'AS-0'}, {'id': 'AS-1'}]
+
+
+@pytest.mark.asyncio
+async def test_rs_iterator_close_cancels_prefetch(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    never = asyncio.Event()
+
+    async def _get(url, **kwargs):
+        offset = kwargs['params']['offset']
+        if offset >= 200:
+            await never.wait()
+        return [{'id': i} for i in range(offset, offset + 100)]
+
+    rs._client.response.headers = {'Content-Range': 'items 0-99/350'}
+    rs._client.get.side_effect = _get
+
+    iterator = rs.prefetch(2).__aiter__()
+    for _ in range(101):
+        await iterator.__anext__()
+    pending = list(iterator._pending)
+    iterator.close()
+    await asyncio.sleep(0)
+
+    assert pending and all(task.cancelled() for task in pending)
+    assert not iterator._pending
+
+
+def _keyset_get(client, count):
+    async def _get(url, **kwargs):
+        assert kwargs['params']['offset'] == 0
+        match = re.search(r'gt\(id,(\d+)\)', url)
+        start = int(match.group(1)) + 1 if match else 0
+        items = [{'id': i} for i in range(start, min(start + kwargs['params']['limit'], count))]
+        client.response.headers = {
+            'Content-Range': f'items 0-{len(items) - 1}/{count - start}',
+        }
+        return items
+
+    client.get.side_effect = _get
+
+
+@pytest.mark.asyncio
+async def test_rs_iterate_by_key(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _keyset_get(rs._client, 250)
+
+    keyset = rs.filter(status='active').iterate_by_key('id')
+    results = [item async for item in keyset]
+
+    assert results == [{'id': i} for i in range(250)]
+    assert await keyset.count() == 250
+    assert rs._client.get.call_count == 3
+    urls = [call[0][0] for call in rs._client.get.call_args_list]
+    assert urls == [
+        'resources?eq(status,active)&ordering(id)',
+        'resources?and(eq(status,active),gt(id,99))&ordering(id)',
+        'resources?and(eq(status,active),gt(id,199))&ordering(id)',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rs_iterate_by_key_missing_key(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get.return_value = [{'name': 'A'}, {'name': 'B'}]
+
+    with pytest.raises(ClientError) as cv:
+        [item async for item in rs.iterate_by_key('id').select('-id').limit(2)]
+
+    assert str(cv.value) == 'Cannot iterate by `id`: a resource has no `id`.'
+    rs._client.get.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_rs_iterate_by_key_not_unique(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get.return_value = [{'id': 1}, {'id': 1}]
+
+    with pytest.raises(ClientError) as cv:
+        [item async for item in rs.iterate_by_key('id').limit(2)]
+
+    assert str(cv.value) == 'Cannot iterate by `id`: `1` does not follow `1`.'
+
+
+@pytest.mark.asyncio
+async def test_rs_iterate_by_key_filter_ignored(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get.return_value = [{'id': 2}, {'id': 1}]
+
+    results = []
+    with pytest.raises(ClientError) as cv:
+        async for item in rs.iterate_by_key('-id').limit(2):
+            results.append(item)
+
+    assert str(cv.value) == 'Cannot iterate by `id`: `2` does not follow `1`.'
+    assert results == [{'id': 2}, {'id': 1}]
+    assert rs._client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rs_stream(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    _paged_get(rs._client, 250)
+
+    results = [item async for item in rs.stream()]
+
+    assert results == [{'id': i} for i in range(250)]
+    assert rs._results is None
+    assert rs.content_range.count == 250
+
+
+@pytest.mark.asyncio
+async def test_rs_optimized_query(mocker, async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+    rs._client.get.return_value = []
+    rs._client.response.headers = {'Content-Range': 'items 0-0/0'}
+
+    rs = rs.filter(R(status='active') | R(status='pending')).filter(~~R(id='PR-1'))
+    [item async for item in rs]
+
+    rs._client.get.assert_awaited_once_with(
+        f'{rs.path}?and(in(status,(active,pending)),eq(id,PR-1))',
+        **{'params': {'limit': 100, 'offset': 0}},
+    )
+
+
+@pytest.mark.asyncio
+async def test_rs_matches_nothing(async_client_mock, async_rs_factory):
+    rs = async_rs_factory(
+        client=async_client_mock(methods=['get']),
+    )
+
+    rs = rs.filter(status='active').filter(~R(status='active'))
+
+    assert [item async for item in rs.all()] == []
+    assert [item async for item in rs.stream()] == []
+    assert await rs.count() == 0
+    assert await rs.first() is None
+    assert await rs.all().fetch_parallel() == []
+    assert [item async for item in rs.filter_in_batches('id', ['ID-1', 'ID-2'])] == []
+    rs._client.get.assert_not_awaited()
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import httpx
+
+import pytest
+
+from connect.client.openapi import OpenAPISpecs, SpecsRegistry
+from connect.client.speccache import SpecsCache
+
+
+@pytest.mark.asyncio
+async def test_aload_from_file():
+    oa = await OpenAPISpecs.aload('tests/data/specs.yml')
+
+    assert oa.exists('get', 'products/PRD-000') is True
+
+
+@pytest.mark.asyncio
+async def test_aload_from_url(httpx_mock, tmp_path):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/specs.yml',
+        data=Path('tests/data/specs.yml').read_bytes(),
+        headers={'ETag': '"v1"'},
+    )
+    cache = SpecsCache(str(tmp_path))
+
+    oa = await OpenAPISpecs.aload('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products/PRD-000') is True
+    assert cache.get('https://localhost/specs.yml')['etag'] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_aload_from_url_error(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/specs.yml',
+        status_code=404,
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await OpenAPISpecs.aload('https://localhost/specs.yml')
+
+
+@pytest.mark.asyncio
+async def test_aload_from_url_fresh_cache(httpx_mock, tmp_path):
+    cache = SpecsCache(str(tmp_path))
+    cache.set('https://localhost/specs.yml', {'paths': {'/products': {'get': {}}}})
+
+    oa = await OpenAPISpecs.aload('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+    assert httpx_mock.get_requests() == []
+
+
+@pytest.mark.asyncio
+async def test_aload_from_url_not_modified(httpx_mock, tmp_path):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/specs.yml',
+        status_code=304,
+    )
+    cache = SpecsCache(str(tmp_path), ttl=0)
+    cache.set('https://localhost/specs.yml', {'paths': {'/products': {'get': {}}}}, etag='"v1"')
+
+    oa = await OpenAPISpecs.aload('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+    assert httpx_mock.get_requests()[0].headers['If-None-Match'] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_aload_from_url_server_error(httpx_mock, tmp_path):
+    httpx_mock.add_response(
+        method='GET',
+        url='https://localhost/specs.yml',
+        status_code=502,
+    )
+    cache = SpecsCache(str(tmp_path), ttl=0)
+    cache.set('https://localhost/specs.yml', {'paths': {'/products': {'get': {}}}})
+
+    oa = await OpenAPISpecs.aload('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+
+
+@pytest.mark.asyncio
+async def test_aload_from_url_offline(httpx_mock, tmp_path):
+    def raise_connect_error(request, extensions):
+        raise httpx.ConnectError('offline', request=request)
+
+    httpx_mock.add_callback(raise_connect_error)
+    cache = SpecsCache(str(tmp_path), ttl=0)
+
+    with pytest.raises(httpx.ConnectError):
+        await OpenAPISpecs.aload('https://localhost/specs.yml', cache=cache)
+
+    cache.set('https://localhost/specs.yml', {'paths': {'/products': {'get': {}}}})
+
+    oa = await OpenAPISpecs.aload('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+
+
+@pytest.mark.asyncio
+async def test_registry_aget():
+    registry = SpecsRegistry()
+
+    specs = await registry.aget('tests/data/specs.yml')
+
+    assert await registry.aget('tests/data/specs.yml') is specs
+    assert registry.get('tests/data/specs.yml') is specs
@@ -0,0 +1,62 @@
+from json import JSONDecodeError
+
+import pytest
+
+from connect.client import codec as codec_module
+from connect.client.codec import JSONCodec, OrjsonCodec, get_default_codec
+
+
+requires_orjson = pytest.mark.skipif(codec_module.orjson is None, reason='orjson not installed')
+
+CODECS = (JSONCodec, pytest.param(OrjsonCodec, marks=requires_orjson))
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_codec_roundtrip(codec):
+    codec = codec()
+    obj = {'id': 'PRD-000', 'items': [1, 2.5, None, True], 'name': 'ñame'}
+
+    data = codec.dumps(obj)
+
+    assert isinstance(data, bytes)
+    assert codec.loads(data) == obj
+    assert codec.loads(data.decode('utf-8')) == obj
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_codec_invalid(codec):
+    with pytest.raises(JSONDecodeError):
+        codec().loads(b'not a json')
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_codec_non_str_keys(codec):
+    codec = codec()
+    assert codec.loads(codec.dumps({1: 'a', 'b': 2})) == {'1': 'a', 'b': 2}
+
+
+@requires_orjson
+def test_orjson_codec_integer_limit():
+    with pytest.raises(TypeError):
+        OrjsonCodec().dumps({'value': 2 ** 64})
+
+
+def test_orjson_codec_not_installed(mocker):
+    mocker.patch.object(codec_module, 'orjson', None)
+
+    with pytest.raises(ImportError) as cv:
+        OrjsonCodec()
+
+    assert str(cv.value) == (
+        'OrjsonCodec requires orjson, install it with '
+        '`pip install connect-openapi-client[orjson]`.'
+    )
+
+
+def test_get_default_codec(mocker):
+    mocker.patch.object(codec_module, 'orjson', mocker.MagicMock())
+
+    codec = get_default_codec()
+
+    assert type(codec) is JSONCodec
+    assert codec.loads(codec.dumps({'value': 2 ** 64})) == {'value': 2 ** 64}
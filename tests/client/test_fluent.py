@@ -1,16 +1,23 @@
 import io
+import json
+import re
+from concurrent.futures import Future
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 
 import responses
 
-from requests import RequestException
+from requests import ConnectionError, ReadTimeout, RequestException
 
+from connect.client.codec import JSONCodec
 from connect.client.constants import CONNECT_ENDPOINT_URL, CONNECT_SPECS_URL
 from connect.client.exceptions import ClientError
 from connect.client.fluent import ConnectClient
 from connect.client.logger import RequestLogger
 from connect.client.models import Collection, NS
+from connect.client.openapi import OpenAPISpecs
+from connect.client.retry import RetryPolicy
 
 
 def test_default_headers():
@@ -180,7 +187,7 @@ def test_execute_validate_with_specs(mocker):
     mocked_specs = mocker.MagicMock()
     mocked_specs.exists.return_value = False
 
-    mocked_specs = mocker.patch('connect.client.fluent.OpenAPISpecs', return_value=mocked_specs)
+    mocker.patch('connect.client.fluent.specs_registry.get', return_value=mocked_specs)
 
     c = ConnectClient('API_KEY')
     with pytest.raises(ClientError) as cv:
@@ -470,13 +477,239 @@ def test_execute_delete(mocked_responses):
 
 
 def test_create_client_with_defaults(mocker):
-    mocked_specs = mocker.patch('connect.client.fluent.OpenAPISpecs')
+    mocked_get = mocker.patch('connect.client.fluent.specs_registry.get')
 
     c = ConnectClient('API_KEY')
-    mocked_specs.assert_called_once_with(CONNECT_SPECS_URL)
+    mocked_get.assert_called_once_with(CONNECT_SPECS_URL, cache=None, lean=False)
     assert c.endpoint == CONNECT_ENDPOINT_URL
 
 
+def test_create_client_shares_specs():
+    c1 = ConnectClient('API_KEY', specs_location='tests/data/specs.yml')
+    c2 = ConnectClient('OTHER_API_KEY', specs_location='tests/data/specs.yml')
+
+    assert c1.specs is c2.specs
+
+
+def test_refresh_specs(mocker):
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    cache = mocker.MagicMock()
+    c = ConnectClient('API_KEY', specs_location='tests/data/specs.yml', specs_cache=cache)
+
+    c.refresh_specs()
+
+    mocked_registry.refresh.assert_called_once_with('tests/data/specs.yml', cache=cache, lean=False)
+    assert c.specs is mocked_registry.refresh.return_value
+    assert c._help_formatter._specs is c.specs
+
+
+def test_refresh_specs_without_specs(mocker):
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    c = ConnectClient('API_KEY', use_specs=False)
+
+    c.refresh_specs()
+
+    mocked_registry.refresh.assert_not_called()
+    assert c.specs is None
+
+
+def test_create_client_lean_specs(mocker):
+    mocked_get = mocker.patch('connect.client.fluent.specs_registry.get')
+
+    ConnectClient('API_KEY', lean_specs=True)
+
+    mocked_get.assert_called_once_with(CONNECT_SPECS_URL, cache=None, lean=True)
+
+
+@pytest.mark.parametrize(
+    ('validate_payloads', 'validate_responses'),
+    ((True, False), (False, True)),
+)
+def test_create_client_lean_specs_with_validation(validate_payloads, validate_responses):
+    with pytest.raises(ValueError) as cv:
+        ConnectClient(
+            'API_KEY',
+            use_specs=False,
+            lean_specs=True,
+            validate_payloads=validate_payloads,
+            validate_responses=validate_responses,
+        )
+
+    assert str(cv.value) == (
+        '`lean_specs` cannot be combined with `validate_payloads` or `validate_responses`.'
+    )
+
+
+def test_set_specs(mocker):
+    mocked_get = mocker.patch('connect.client.fluent.specs_registry.get')
+    specs = OpenAPISpecs('tests/data/specs.yml')
+
+    c = ConnectClient('API_KEY', specs_loading='lazy')
+    c.specs = specs
+
+    assert c.specs is specs
+    assert c._get_help_formatter()._specs is specs
+    mocked_get.assert_not_called()
+
+
+def test_validate_payloads(mocked_responses):
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_payloads=True,
+    )
+
+    with pytest.raises(ClientError) as cv:
+        c.create('products', payload={'name': 1})
+
+    assert str(cv.value) == (
+        'Invalid payload for `POST products`: '
+        '$.category: is required; $.name: must be of type string'
+    )
+    assert cv.value.errors == ['$.category: is required', '$.name: must be of type string']
+    assert len(mocked_responses.calls) == 0
+
+
+def test_validate_payloads_valid(mocked_responses):
+    mocked_responses.add('POST', 'https://localhost/products', json={'id': 'PRD-000'})
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_payloads=True,
+    )
+
+    result = c.create('products', payload={'name': 'Product', 'category': {'id': 'CAT-000'}})
+
+    assert result == {'id': 'PRD-000'}
+
+
+def test_validate_responses(mocked_responses):
+    mocked_responses.add('GET', 'https://localhost/products', json=[{'id': 1}])
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_responses=True,
+    )
+
+    with pytest.raises(ClientError) as cv:
+        c.get('products')
+
+    assert str(cv.value) == 'Invalid response for `GET products`: $[0].id: must be of type string'
+    assert cv.value.status_code == 200
+
+
+def test_validate_responses_get_items_not_validated(mocked_responses):
+    mocked_responses.add('GET', 'https://localhost/products', json=[{'id': 1}])
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+        validate_responses=True,
+    )
+
+    assert list(c.get_items('products')) == [{'id': 1}]
+
+
+def test_validate_disabled_by_default(mocked_responses):
+    mocked_responses.add('POST', 'https://localhost/products', json=[{'id': 1}])
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_location='tests/data/specs.yml',
+    )
+
+    assert c.create('products', payload={'name': 1}) == [{'id': 1}]
+
+
+def test_create_client_invalid_specs_loading():
+    with pytest.raises(ValueError) as cv:
+        ConnectClient('API_KEY', specs_loading='later')
+
+    assert str(cv.value) == '`specs_loading` must be one of `eager`, `lazy` or `background`.'
+
+
+def test_lazy_specs(mocker):
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    c = ConnectClient('API_KEY', specs_location='tests/data/specs.yml', specs_loading='lazy')
+
+    mocked_registry.get.assert_not_called()
+    assert c.specs is mocked_registry.get.return_value
+    assert c.specs is mocked_registry.get.return_value
+    mocked_registry.get.assert_called_once_with('tests/data/specs.yml', cache=None, lean=False)
+
+
+def test_background_specs(mocker):
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    future = Future()
+    mocked_registry.submit.return_value = future
+    c = ConnectClient('API_KEY', specs_location='tests/data/specs.yml', specs_loading='background')
+
+    mocked_registry.submit.assert_called_once_with('tests/data/specs.yml', cache=None, lean=False)
+    specs = mocker.MagicMock()
+    future.set_result(specs)
+
+    assert c.specs is specs
+    assert c._help_formatter._specs is specs
+    mocked_registry.get.assert_not_called()
+
+
+def test_background_specs_skip_validation(mocker, mocked_responses):
+    mocked_responses.add('GET', 'https://localhost/resources', json=[])
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    future = Future()
+    mocked_registry.submit.return_value = future
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_loading='background',
+        wait_for_specs=False,
+    )
+
+    assert c.get('resources') == []
+
+    specs = mocker.MagicMock()
+    specs.exists.return_value = False
+    future.set_result(specs)
+
+    with pytest.raises(ClientError) as cv:
+        c.get('resources')
+
+    assert str(cv.value) == 'The path `resources` does not exist.'
+
+
+def test_lazy_specs_skip_validation_starts_loading(mocker, mocked_responses):
+    mocked_responses.add('GET', 'https://localhost/resources', json=[])
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    mocked_registry.submit.return_value = Future()
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        specs_loading='lazy',
+        wait_for_specs=False,
+    )
+
+    mocked_registry.submit.assert_not_called()
+    assert c.get('resources') == []
+    assert c.get('resources') == []
+    mocked_registry.submit.assert_called_once()
+    mocked_registry.get.assert_not_called()
+
+
+def test_lazy_specs_help(mocker):
+    mocked_registry = mocker.patch('connect.client.fluent.specs_registry')
+    format_mock = mocker.patch('connect.client.fluent.DefaultFormatter.format')
+    c = ConnectClient('API_KEY', specs_loading='lazy')
+
+    c.help()
+
+    mocked_registry.get.assert_called_once()
+    assert c._help_formatter._specs is mocked_registry.get.return_value
+    format_mock.assert_called_once_with(None)
+
+
 def test_get_attr_with_underscore(mocker):
     c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
 
@@ -510,7 +743,10 @@ def test_help(mocker):
 
 
 def test_non_server_error(mocker):
-    mocker.patch('connect.client.mixins.requests.request', side_effect=RequestException('generic'))
+    mocker.patch(
+        'connect.client.mixins.requests.Session.request',
+        side_effect=RequestException('generic'),
+    )
 
     c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
 
@@ -518,3 +754,318 @@ def test_non_server_error(mocker):
         c.execute('get', 'path')
 
     assert str(cv.value) == 'Unexpected error'
+
+
+def test_session_is_reused(mocked_responses):
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json=[],
+    )
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json=[],
+    )
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    c.execute('get', 'resources')
+    session = c.session
+    c.execute('get', 'resources')
+
+    assert c.session is session
+    assert len(mocked_responses.calls) == 2
+
+
+def test_session_pool_maxsize():
+    c = ConnectClient('API_KEY', use_specs=False, pool_maxsize=25)
+
+    adapter = c.session.get_adapter('https://localhost')
+
+    assert adapter._pool_maxsize == 25
+
+
+def test_close(mocker):
+    c = ConnectClient('API_KEY', use_specs=False)
+    session = c.session
+    close_mock = mocker.patch.object(session, 'close')
+
+    c.close()
+
+    close_mock.assert_called_once()
+    assert c._session is None
+
+
+def test_context_manager(mocker):
+    with ConnectClient('API_KEY', use_specs=False) as c:
+        session = c.session
+        close_mock = mocker.patch.object(session, 'close')
+
+    close_mock.assert_called_once()
+    assert c.session is not session
+
+
+def test_execute_retries_exception(mocker):
+    response = mocker.MagicMock(
+        status_code=200,
+        headers={'Content-Type': 'application/json'},
+        content=b'[]',
+    )
+    mocked_request = mocker.patch(
+        'connect.client.mixins.requests.Session.request',
+        side_effect=[ConnectionError('reset'), response],
+    )
+    mocked_sleep = mocker.patch('connect.client.mixins.time.sleep')
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False, max_retries=1)
+
+    assert c.execute('get', 'resources') == []
+    assert mocked_request.call_count == 2
+    mocked_sleep.assert_called_once()
+
+
+def test_get_items_closes_retried_responses(mocker):
+    failed = mocker.MagicMock(status_code=502, headers={})
+    response = mocker.MagicMock(status_code=200, headers={}, encoding='utf-8')
+    response.iter_content.return_value = [b'[{"id": 1}]']
+    mocker.patch(
+        'connect.client.mixins.requests.Session.request',
+        side_effect=[failed, response],
+    )
+    mocker.patch('connect.client.mixins.time.sleep')
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False, max_retries=1)
+
+    assert list(c.get_items('resources')) == [{'id': 1}]
+    failed.close.assert_called_once()
+    response.close.assert_called_once()
+
+
+def test_execute_no_retry_read_timeout_non_idempotent(mocker):
+    mocked_request = mocker.patch(
+        'connect.client.mixins.requests.Session.request',
+        side_effect=ReadTimeout('timeout'),
+    )
+    mocked_sleep = mocker.patch('connect.client.mixins.time.sleep')
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False, max_retries=1)
+
+    with pytest.raises(ClientError):
+        c.create('resources', payload={'name': 'name'})
+
+    mocked_request.assert_called_once()
+    mocked_sleep.assert_not_called()
+
+
+def test_execute_retry_policy(mocked_responses, mocker):
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        status=429,
+    )
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json=[],
+    )
+    mocked_sleep = mocker.patch('connect.client.mixins.time.sleep')
+
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        retry_policy=RetryPolicy(max_retries=3, backoff_factor=0.2, jitter=False),
+    )
+
+    assert c.execute('get', 'resources') == []
+    mocked_sleep.assert_called_once_with(0.2)
+
+
+def test_execute_retry_after(mocked_responses, mocker):
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        status=429,
+        headers={'Retry-After': '3'},
+    )
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json=[],
+    )
+    mocked_sleep = mocker.patch('connect.client.mixins.time.sleep')
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False, max_retries=1)
+
+    assert c.execute('get', 'resources') == []
+    mocked_sleep.assert_called_once_with(3.0)
+
+
+def test_execute_rate_limiter(mocked_responses, mocker):
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json=[],
+    )
+    mocked_sleep = mocker.patch('connect.client.mixins.time.sleep')
+    limiter = mocker.MagicMock()
+    limiter.reserve.return_value = 0.25
+
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        rate_limiter=limiter,
+    )
+
+    c.execute('get', 'resources')
+
+    limiter.reserve.assert_called_once()
+    mocked_sleep.assert_called_once_with(0.25)
+
+
+def test_get_items(mocked_responses):
+    expected = [{'id': i} for i in range(10)]
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json=expected,
+        headers={'Content-Range': 'items 0-9/10'},
+    )
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    items = c.get_items('resources', chunk_size=16)
+
+    assert c.response.headers['Content-Range'] == 'items 0-9/10'
+    assert list(items) == expected
+
+
+def test_get_items_no_content(mocked_responses):
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        status=204,
+    )
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    assert list(c.get_items('resources')) == []
+
+
+def test_get_items_error(mocked_responses):
+    mocked_responses.add(
+        responses.GET,
+        'https://localhost/resources',
+        json={'error_code': 'code', 'errors': ['error']},
+        status=400,
+    )
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    with pytest.raises(ClientError) as cv:
+        c.get_items('resources')
+
+    assert cv.value.error_code == 'code'
+
+
+def test_get_items_stream_error(mocker):
+    response = mocker.MagicMock(status_code=200, encoding=None)
+    response.iter_content.side_effect = RequestException()
+    mocker.patch('connect.client.mixins.requests.Session.request', return_value=response)
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    with pytest.raises(ClientError):
+        list(c.get_items('resources'))
+    response.close.assert_called_once()
+
+
+@pytest.mark.parametrize('codec', (JSONCodec(), None))
+def test_execute_json_codec(mocked_responses, codec):
+    mocked_responses.add(
+        responses.POST,
+        'https://localhost/resources',
+        json={'id': 'ID', 'name': 'ñame'},
+        status=201,
+    )
+
+    c = ConnectClient(
+        'API_KEY',
+        endpoint='https://localhost',
+        use_specs=False,
+        json_codec=codec,
+    )
+
+    result = c.create('resources', payload={'name': 'ñame'})
+
+    assert result == {'id': 'ID', 'name': 'ñame'}
+    request = mocked_responses.calls[0].request
+    assert json.loads(request.body) == {'name': 'ñame'}
+    assert request.headers['Content-Type'] == 'application/json'
+
+
+def test_execute_json_codec_custom_content_type(mocked_responses):
+    mocked_responses.add(
+        responses.PUT,
+        'https://localhost/resources/ID',
+        json={},
+    )
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+
+    c.update(
+        'resources/ID',
+        payload={'name': 'name'},
+        headers={'Content-Type': 'application/vnd.api+json'},
+    )
+
+    request = mocked_responses.calls[0].request
+    assert request.headers['Content-Type'] == 'application/vnd.api+json'
+
+
+def _paged_callback(count):
+    def _callback(request):
+        params = parse_qs(urlparse(request.url).query)
+        offset, limit = int(params['offset'][0]), int(params['limit'][0])
+        items = [{'id': i} for i in range(offset, min(offset + limit, count))]
+        last = offset + max(len(items), 1) - 1
+        headers = {'Content-Range': f'items {offset}-{last}/{count}'}
+        return 200, headers, json.dumps(items)
+
+    return _callback
+
+
+def test_concurrent_calls_share_client_state(mocked_responses, mocker):
+    mocked_responses.add_callback(
+        responses.GET,
+        re.compile('https://localhost/resources.*'),
+        callback=_paged_callback(300),
+        content_type='application/json',
+    )
+    create_session = mocker.spy(ConnectClient, '_create_session')
+
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False)
+    c.logger = mocker.MagicMock()
+
+    assert list(c.resources.all().prefetch(2)) == [{'id': i} for i in range(300)]
+    assert len(c.resources.all().fetch_parallel(workers=3)) == 300
+    assert len(list(c.resources.all().filter_in_batches('id', ['1', '2'], batch_size=1))) == 300
+
+    assert create_session.call_count == 1
+    assert c.logger.log_request.call_count == len(mocked_responses.calls) == 13
+
+
+def test_close_shuts_down_executor(mocker):
+    c = ConnectClient('API_KEY', endpoint='https://localhost', use_specs=False, pool_maxsize=3)
+    executor = c.executor
+
+    assert executor._max_workers == 3
+    assert c.submit(lambda: c.api_key).result() == 'API_KEY'
+
+    c.close()
+
+    assert c._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
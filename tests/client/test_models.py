@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from connect.client.exceptions import ClientError
@@ -665,6 +667,22 @@ def test_rs_limit_invalid(rs_factory):
         rs.limit(-1)
 
 
+def test_rs_prefetch(rs_factory):
+    rs = rs_factory().prefetch(3)
+
+    assert rs._prefetch == 3
+    assert rs.all()._prefetch == 3
+
+
+def test_rs_prefetch_invalid(rs_factory):
+    rs = rs_factory()
+    with pytest.raises(TypeError):
+        rs.prefetch('3')
+
+    with pytest.raises(ValueError):
+        rs.prefetch(-1)
+
+
 def test_rs_request(mocker, rs_factory):
     rs = rs_factory()
     content_range = ContentRange(0, 0, 0)
@@ -845,6 +863,39 @@ def test_rs_configure(rs_factory):
     assert s1 != rs
 
 
+def test_rs_copy_shares_state(rs_factory):
+    rs = rs_factory().configure(headers={'X-Custom': 'value'}).order_by('name').select('-id')
+    s1 = rs.filter(status='active')
+
+    assert s1._config is rs._config
+    assert s1._ordering is rs._ordering
+    assert s1._select is rs._select
+    assert s1._results is None
+
+
+def test_rs_copy_isolation(rs_factory):
+    rs = rs_factory().order_by('name').select('-id')
+    s1 = rs.order_by('-created').select('-events')
+    s2 = rs.order_by('created')
+
+    assert rs._ordering == ('name',)
+    assert rs._select == ('-id',)
+    assert s1._ordering == ('name', '-created')
+    assert s1._select == ('-id', '-events')
+    assert s2._ordering == ('name', 'created')
+
+
+def test_rs_request_kwargs_copy_config(rs_factory):
+    rs = rs_factory().configure(headers={'X-Custom': 'value'}, params={'k': 'v'})
+
+    kwargs = rs._get_request_kwargs()
+    kwargs['headers']['Authorization'] = 'ApiKey'
+    kwargs['params']['offset'] = 100
+
+    assert rs._config == {'headers': {'X-Custom': 'value'}, 'params': {'k': 'v'}}
+    assert kwargs['params'] == {'k': 'v', 'limit': 100, 'offset': 100}
+
+
 def test_rs_order_by(rs_factory):
     rs = rs_factory()
     fields = ('field1', '-field2')
@@ -965,3 +1016,378 @@ def test_rs_iterate_already_evaluated(mocker, rs_factory):
     rs._client.get = mocker.MagicMock(return_value=expected)
     assert bool(rs) is True
     assert [item for item in rs] == expected
+
+
+def _paged_get(mocker, client, count):
+    def _get(url, **kwargs):
+        offset = kwargs['params']['offset']
+        limit = kwargs['params']['limit']
+        return [{'id': i} for i in range(offset, min(offset + limit, count))]
+
+    client.response.headers = {'Content-Range': f'items 0-99/{count}'}
+    client.get = mocker.MagicMock(side_effect=_get)
+
+
+@pytest.mark.parametrize('prefetch', (1, 2, 10))
+def test_rs_iterate_prefetch(mocker, rs_factory, prefetch):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 350)
+
+    results = list(rs.prefetch(prefetch))
+
+    assert results == [{'id': i} for i in range(350)]
+    offsets = [call[1]['params']['offset'] for call in rs._client.get.call_args_list]
+    assert sorted(offsets) == [0, 100, 200, 300]
+
+
+def test_rs_values_list_prefetch(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 150)
+
+    results = list(rs.prefetch(2).values_list('id'))
+
+    assert results == [{'id': i} for i in range(150)]
+
+
+def test_rs_fetch_parallel(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 350)
+
+    results = rs.fetch_parallel(workers=3)
+
+    assert results == [{'id': i} for i in range(350)]
+    assert rs._results == results
+    offsets = [call[1]['params']['offset'] for call in rs._client.get.call_args_list]
+    assert offsets[0] == 0 and rs._client.get.call_args_list[0][1]['params']['limit'] == 0
+    assert sorted(offsets[1:]) == [0, 100, 200, 300]
+
+
+def test_rs_fetch_parallel_values_list(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 150)
+
+    results = rs.values_list('id').fetch_parallel()
+
+    assert results == [{'id': i} for i in range(150)]
+
+
+def test_rs_fetch_parallel_slice(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 150)
+
+    results = rs[10:20].fetch_parallel()
+
+    assert results == [{'id': i} for i in range(10, 20)]
+    rs._client.get.assert_called_once()
+
+
+def _batch_get(mocker, client, items):
+    def _get(url, **kwargs):
+        match = re.search(r'in\(product\.id,\(([^)]*)\)\)', url)
+        values = match.group(1).split(',')
+        return [item for item in items if item['product']['id'] in values]
+
+    client.response.headers = {'Content-Range': 'items 0-1/2'}
+    client.get = mocker.MagicMock(side_effect=_get)
+
+
+def test_rs_filter_in_batches(mocker, rs_factory):
+    rs = rs_factory()
+    items = [{'id': f'AS-{i}', 'product': {'id': f'PRD-{i}'}} for i in range(5)]
+    _batch_get(mocker, rs._client, items)
+
+    results = list(
+        rs.filter(status='active').filter_in_batches(
+            'product.id',
+            [f'PRD-{i}' for i in (0, 1, 1, 2, 3, 4)],
+            batch_size=2,
+        ),
+    )
+
+    assert results == items
+    urls = sorted(call[0][0] for call in rs._client.get.call_args_list)
+    assert urls == [
+        'resources?and(eq(status,active),in(product.id,(PRD-0,PRD-1)))',
+        'resources?and(eq(status,active),in(product.id,(PRD-2,PRD-3)))',
+        'resources?and(eq(status,active),in(product.id,(PRD-4)))',
+    ]
+
+
+def test_rs_filter_in_batches_deduplicate(mocker, rs_factory):
+    rs = rs_factory()
+    items = [
+        {'id': 'AS-0', 'product': {'id': 'PRD-0'}},
+        {'id': 'AS-0', 'product': {'id': 'PRD-1'}},
+        {'id': 'AS-1', 'product': {'id': 'PRD-1'}},
+    ]
+    _batch_get(mocker, rs._client, items)
+
+    results = list(rs.filter_in_batches('product.id', ['PRD-0', 'PRD-1'], batch_size=1))
+
+    assert results == [items[0], items[2]]
+
+
+def test_rs_filter_in_batches_values_list(mocker, rs_factory):
+    rs = rs_factory()
+    items = [{'id': f'AS-{i}', 'product': {'id': f'PRD-{i}'}} for i in range(3)]
+    _batch_get(mocker, rs._client, items)
+
+    results = list(
+        rs.values_list('product.id').filter_in_batches(
+            'product.id',
+            ['PRD-0', 'PRD-1', 'PRD-2'],
+            batch_size=2,
+            workers=1,
+        ),
+    )
+
+    assert results == [{'product.id': f'PRD-{i}'} for i in range(3)]
+
+
+@pytest.mark.parametrize(
+    ('batch_size', 'exc', 'msg'),
+    (
+        ('1', TypeError, '`batch_size` must be an integer.'),
+        (0, ValueError, '`batch_size` must be a positive, non-zero integer.'),
+    ),
+)
+def test_rs_filter_in_batches_invalid_batch_size(rs_factory, batch_size, exc, msg):
+    rs = rs_factory()
+    with pytest.raises(exc) as cv:
+        rs.filter_in_batches('id', ['ID'], batch_size=batch_size)
+
+    assert str(cv.value) == msg
+
+
+def test_rs_iterator_close_cancels_prefetch(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 350)
+    futures = [mocker.MagicMock(), mocker.MagicMock()]
+    rs._client.submit = mocker.MagicMock(side_effect=futures)
+    futures[0].result.return_value = ([{'id': 100}], rs._content_range)
+
+    iterator = iter(rs.prefetch(2))
+    for _ in range(101):
+        next(iterator)
+    iterator.close()
+
+    futures[0].cancel.assert_not_called()
+    futures[1].cancel.assert_called_once()
+
+
+def _keyset_get(mocker, client, count):
+    def _get(url, **kwargs):
+        assert kwargs['params']['offset'] == 0
+        match = re.search(r'gt\(id,(\d+)\)', url)
+        start = int(match.group(1)) + 1 if match else 0
+        items = [{'id': i} for i in range(start, min(start + kwargs['params']['limit'], count))]
+        client.response.headers = {
+            'Content-Range': f'items 0-{len(items) - 1}/{count - start}',
+        }
+        return items
+
+    client.get = mocker.MagicMock(side_effect=_get)
+
+
+def test_rs_iterate_by_key(mocker, rs_factory):
+    rs = rs_factory()
+    _keyset_get(mocker, rs._client, 250)
+
+    keyset = rs.filter(status='active').iterate_by_key('id')
+    results = list(keyset)
+
+    assert results == [{'id': i} for i in range(250)]
+    assert keyset.count() == 250
+    assert rs._client.get.call_count == 3
+    urls = [call[0][0] for call in rs._client.get.call_args_list]
+    assert urls == [
+        'resources?eq(status,active)&ordering(id)',
+        'resources?and(eq(status,active),gt(id,99))&ordering(id)',
+        'resources?and(eq(status,active),gt(id,199))&ordering(id)',
+    ]
+
+
+def test_rs_iterate_by_key_descending(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get = mocker.MagicMock(side_effect=[
+        [{'id': 4}, {'id': 3}],
+        [{'id': 2}, {'id': 1}],
+    ])
+
+    results = list(rs.iterate_by_key('-id').limit(2))
+
+    assert results == [{'id': 4}, {'id': 3}, {'id': 2}, {'id': 1}]
+    assert rs._client.get.call_args_list[1][0][0] == 'resources?lt(id,3)&ordering(-id)'
+
+
+def test_rs_iterate_by_key_ordering(rs_factory):
+    rs = rs_factory()
+
+    with pytest.raises(ValueError) as cv:
+        rs.order_by('name').iterate_by_key('id')
+
+    assert str(cv.value) == '`iterate_by_key` cannot be combined with `order_by`.'
+
+    with pytest.raises(ValueError):
+        rs.iterate_by_key('id').order_by('name')
+
+
+def test_rs_iterate_by_key_missing_key(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get = mocker.MagicMock(return_value=[{'name': 'A'}, {'name': 'B'}])
+
+    with pytest.raises(ClientError) as cv:
+        list(rs.iterate_by_key('id').select('-id').limit(2))
+
+    assert str(cv.value) == 'Cannot iterate by `id`: a resource has no `id`.'
+    rs._client.get.assert_called_once()
+
+
+def test_rs_iterate_by_key_not_unique(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get = mocker.MagicMock(return_value=[{'id': 1}, {'id': 1}])
+
+    with pytest.raises(ClientError) as cv:
+        list(rs.iterate_by_key('id').limit(2))
+
+    assert str(cv.value) == 'Cannot iterate by `id`: `1` does not follow `1`.'
+
+
+def test_rs_iterate_by_key_filter_ignored(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.response.headers = {'Content-Range': 'items 0-1/4'}
+    rs._client.get = mocker.MagicMock(return_value=[{'id': 1}, {'id': 2}])
+
+    results = []
+    with pytest.raises(ClientError) as cv:
+        for item in rs.iterate_by_key('id').limit(2):
+            results.append(item)
+
+    assert str(cv.value) == 'Cannot iterate by `id`: `1` does not follow `2`.'
+    assert results == [{'id': 1}, {'id': 2}]
+    assert rs._client.get.call_count == 2
+
+
+def test_rs_iterate_by_key_values_list(mocker, rs_factory):
+    rs = rs_factory()
+    _keyset_get(mocker, rs._client, 150)
+
+    results = list(rs.iterate_by_key().values_list('id'))
+
+    assert results == [{'id': i} for i in range(150)]
+
+
+def test_rs_stream(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 250)
+
+    results = list(rs.stream())
+
+    assert results == [{'id': i} for i in range(250)]
+    assert rs._results is None
+    assert rs.content_range.count == 250
+
+
+def test_rs_stream_values_list(mocker, rs_factory):
+    rs = rs_factory()
+    _paged_get(mocker, rs._client, 150)
+
+    results = list(rs.values_list('id').stream())
+
+    assert results == [{'id': i} for i in range(150)]
+
+
+def test_rs_stream_empty(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.get = mocker.MagicMock(return_value=[])
+    rs._client.response.headers = {'Content-Range': 'items 0-0/0'}
+
+    assert list(rs.stream()) == []
+    assert rs._results is None
+
+
+def test_rs_stream_incremental(mocker, rs_factory):
+    rs = rs_factory()
+
+    def _get_items(url, **kwargs):
+        offset = kwargs['params']['offset']
+        last = min(offset + 100, 150)
+        rs._client.response.headers = {'Content-Range': f'items {offset}-{last - 1}/150'}
+        return iter([{'id': i} for i in range(offset, last)])
+
+    rs._client.get_items = mocker.MagicMock(side_effect=_get_items)
+
+    results = list(rs.stream(incremental=True))
+
+    assert results == [{'id': i} for i in range(150)]
+    assert rs._client.get_items.call_count == 2
+    rs._client.get.assert_not_called()
+
+
+def test_rs_stream_incremental_empty(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.response.headers = {'Content-Range': 'items 0-0/0'}
+    rs._client.get_items = mocker.MagicMock(return_value=iter([]))
+
+    assert list(rs.stream(incremental=True)) == []
+
+
+def test_rs_optimized_query(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.get = mocker.MagicMock(return_value=[])
+    rs._client.response.headers = {'Content-Range': 'items 0-0/0'}
+
+    list(rs.filter(R(status='active') | R(status='pending')).filter(~~R(id='PR-1')))
+
+    rs._client.get.assert_called_once_with(
+        f'{rs.path}?and(in(status,(active,pending)),eq(id,PR-1))',
+        **{'params': {'limit': 100, 'offset': 0}},
+    )
+
+
+def test_rs_same_field_lookups_sent_to_server(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.get = mocker.MagicMock(return_value=[{'id': 'PR-1'}])
+    rs._client.response.headers = {'Content-Range': 'items 0-0/1'}
+
+    rs = rs.filter(R().tags.id.eq('A') & R().tags.id.eq('B'))
+
+    assert list(rs) == [{'id': 'PR-1'}]
+    rs._client.get.assert_called_once_with(
+        f'{rs.path}?and(eq(tags.id,A),eq(tags.id,B))',
+        **{'params': {'limit': 100, 'offset': 0}},
+    )
+
+
+def test_rs_negated_empty_lookup_matches_all(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.get = mocker.MagicMock(return_value=[{'id': 'PR-1'}])
+    rs._client.response.headers = {'Content-Range': 'items 0-0/1'}
+
+    rs = rs.filter(R(status='active') & (R(id='PR-1') | ~R(id__in=[])))
+
+    assert list(rs) == [{'id': 'PR-1'}]
+    rs._client.get.assert_called_once_with(
+        f'{rs.path}?eq(status,active)',
+        **{'params': {'limit': 100, 'offset': 0}},
+    )
+
+
+def test_rs_matches_nothing(mocker, rs_factory):
+    rs = rs_factory()
+    rs._client.get = mocker.MagicMock()
+
+    rs = rs.filter(status='active').filter(~R(status='active'))
+
+    assert list(rs.all()) == []
+    assert list(rs.stream()) == []
+    assert rs.count() == 0
+    assert rs.first() is None
+    assert rs.all()[0] is None
+    assert bool(rs.all()) is False
+    assert rs.all().fetch_parallel() == []
+    assert list(rs.filter_in_batches('id', ['ID-1', 'ID-2'])) == []
+    rs._client.get.assert_not_called()
@@ -1,6 +1,24 @@
+import json
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from connect.client.openapi import OpenAPISpecs
+import requests
+
+import yaml
+
+from connect.client.openapi import (
+    OpenAPISpecs,
+    SpecsRegistry,
+    compile_specs,
+    lean_specs,
+    main,
+    parse_specs,
+)
+from connect.client.speccache import SpecsCache
 
 
 def test_load_from_file():
@@ -152,6 +170,531 @@ def test_get_nested_collections(openapi_specs):
     ] == [x[0] for x in nested]
 
 
+def test_get_nested_collections_without_nested(openapi_specs):
+    assert openapi_specs.get_nested_collections('usage/records/REC-000') == []
+
+
 def test_get_nested_namespaces(openapi_specs):
     nested = openapi_specs.get_nested_namespaces('dictionary')
     assert nested == ['extensions']
+
+
+def test_get_nested_namespaces_unique(openapi_specs):
+    assert openapi_specs.get_nested_namespaces('auth') == ['password', 'user']
+
+
+def test_get_nested_namespaces_not_found(openapi_specs):
+    assert openapi_specs.get_nested_namespaces('unknown') == []
+    assert openapi_specs.get_namespaced_collections('unknown') == []
+
+
+def test_get_actions_sibling_prefix(openapi_specs):
+    actions = openapi_specs.get_actions('offers/offers/OFF-000/features')
+    assert [name for name, _ in actions] == ['{id}']
+
+
+@pytest.mark.parametrize(
+    ('path', 'expected'),
+    (
+        ('products', '/products'),
+        ('products/PRD-000?eq(status,published)', '/products/{id}'),
+        (
+            'products/PRD-000/actions/regeneratesecret',
+            '/products/{product_id}/actions/regeneratesecret',
+        ),
+        ('products/PRD-000/actions/ACT-000', '/products/{product_id}/actions/{id}'),
+        (
+            'agreements/AGP-000/versions/1/activate',
+            '/agreements/{agreement_id}/versions/{version}/activate',
+        ),
+        ('products/PRD-000/does-not-exist', None),
+        ('products/PRD-000/items/PRD-000-0001/endsale/extra', None),
+    ),
+)
+def test_get_path(openapi_specs, path, expected):
+    assert openapi_specs._get_path(path) == expected
+
+
+def test_exists_cache():
+    oa = OpenAPISpecs('tests/data/specs.yml', cache_size=2)
+
+    assert oa.exists('get', 'products/PRD-000') is True
+    assert oa.exists('post', 'products/PRD-000?limit=10') is False
+    assert oa.exists('put', 'products/PRD-000') is True
+    assert oa.exists('get', 'products/PRD-001') is True
+    assert oa.exists('get', 'products/PRD-002') is True
+    assert oa.exists('get', 'products/PRD-000') is True
+    assert oa.exists('get', 'products') is True
+    assert oa.exists('get', 'products/PRD-003/items') is True
+    assert oa.exists('get', 'products/PRD-004/items') is True
+
+    info = oa.cache_info()
+    assert info.hits == 6
+    assert info.misses == 3
+    assert info.maxsize == 2
+    assert info.currsize == 2
+
+
+def test_load_from_url_stores_in_cache(mocked_responses, tmp_path):
+    mocked_responses.add(
+        'GET',
+        'https://localhost/specs.yml',
+        body=open('tests/data/specs.yml', 'r').read(),
+        headers={'ETag': '"v1"'},
+    )
+    cache = SpecsCache(str(tmp_path))
+
+    oa = OpenAPISpecs('https://localhost/specs.yml', cache=cache)
+
+    entry = cache.get('https://localhost/specs.yml')
+    assert entry['etag'] == '"v1"'
+    assert list(entry['specs']['paths']) == list(oa._specs['paths'])
+
+
+def test_load_from_url_fresh_cache(mocked_responses, tmp_path):
+    cache = SpecsCache(str(tmp_path))
+    cache.set('https://localhost/specs.yml', {'paths': {'/products': {'get': {}}}})
+
+    oa = OpenAPISpecs('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+    assert len(mocked_responses.calls) == 0
+
+
+def test_load_from_url_revalidate_not_modified(mocked_responses, tmp_path):
+    mocked_responses.add('GET', 'https://localhost/specs.yml', status=304)
+    cache = SpecsCache(str(tmp_path), ttl=0)
+    cache.set(
+        'https://localhost/specs.yml',
+        {'paths': {'/products': {'get': {}}}},
+        etag='"v1"',
+        last_modified='Wed, 21 Oct 2015 07:28:00 GMT',
+    )
+
+    oa = OpenAPISpecs('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+    headers = mocked_responses.calls[0].request.headers
+    assert headers['If-None-Match'] == '"v1"'
+    assert headers['If-Modified-Since'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+
+def test_load_from_url_revalidate_modified(mocked_responses, tmp_path):
+    mocked_responses.add(
+        'GET',
+        'https://localhost/specs.yml',
+        body=open('tests/data/specs.yml', 'r').read(),
+        headers={'ETag': '"v2"'},
+    )
+    cache = SpecsCache(str(tmp_path), ttl=0)
+    cache.set('https://localhost/specs.yml', {'paths': {}}, etag='"v1"')
+
+    oa = OpenAPISpecs('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+    assert cache.get('https://localhost/specs.yml')['etag'] == '"v2"'
+
+
+@pytest.mark.parametrize(
+    'response',
+    (
+        {'body': requests.ConnectionError()},
+        {'status': 503},
+    ),
+)
+def test_load_from_url_offline_fallback(mocked_responses, tmp_path, response):
+    mocked_responses.add('GET', 'https://localhost/specs.yml', **response)
+    cache = SpecsCache(str(tmp_path), ttl=0)
+    cache.set('https://localhost/specs.yml', {'paths': {'/products': {'get': {}}}})
+
+    oa = OpenAPISpecs('https://localhost/specs.yml', cache=cache)
+
+    assert oa.exists('get', 'products') is True
+
+
+def test_load_from_url_offline_without_cache(mocked_responses, tmp_path):
+    mocked_responses.add(
+        'GET',
+        'https://localhost/specs.yml',
+        body=requests.ConnectionError(),
+    )
+
+    with pytest.raises(requests.ConnectionError):
+        OpenAPISpecs('https://localhost/specs.yml', cache=SpecsCache(str(tmp_path)))
+
+
+def test_parse_specs_yaml():
+    assert parse_specs('paths:\n  /products:\n    get: {}\n') == {
+        'paths': {'/products': {'get': {}}},
+    }
+
+
+def test_parse_specs_json():
+    assert parse_specs(' {"paths": {"/products": {"get": {}}}}') == {
+        'paths': {'/products': {'get': {}}},
+    }
+
+
+def test_load_from_json_file(tmp_path):
+    specs = yaml.safe_load(open('tests/data/specs.yml', 'r'))
+    path = tmp_path / 'specs.json'
+    path.write_text(json.dumps(specs, default=str))
+
+    oa = OpenAPISpecs(str(path))
+
+    assert list(oa._specs['paths']) == list(specs['paths'])
+
+
+def test_compile_specs():
+    specs = {
+        'openapi': '3.0.0',
+        'info': {'title': 'Connect', 'version': '1.0', 'contact': {'name': 'me'}},
+        'components': {'schemas': {}},
+        'paths': {
+            '/products': {
+                'summary': 'Products',
+                'get': {
+                    'operationId': 'products_list',
+                    'summary': 'List',
+                    'parameters': [
+                        {'$ref': '#/components/parameters/limit'},
+                        {'name': 'id', 'description': 'The id', 'schema': {}},
+                    ],
+                    'responses': {'200': {}},
+                },
+                'post': {'operationId': 'products_create', 'requestBody': {}},
+            },
+        },
+    }
+
+    assert compile_specs(specs) == {
+        'openapi': '3.0.0',
+        'info': {'title': 'Connect', 'version': '1.0'},
+        'tags': [],
+        'paths': {
+            '/products': {
+                'summary': 'Products',
+                'get': {
+                    'operationId': 'products_list',
+                    'summary': 'List',
+                    'parameters': [
+                        {'$ref': '#/components/parameters/limit'},
+                        {'name': 'id', 'description': 'The id'},
+                    ],
+                },
+                'post': {'operationId': 'products_create'},
+            },
+        },
+    }
+
+
+def test_compile_specs_cli(tmp_path, openapi_specs):
+    destination = tmp_path / 'specs.json'
+
+    main(['tests/data/specs.yml', str(destination)])
+
+    oa = OpenAPISpecs(str(destination))
+    assert oa.title == openapi_specs.title
+    assert oa.version == openapi_specs.version
+    assert oa.get_namespaces() == openapi_specs.get_namespaces()
+    assert oa.get_collections() == openapi_specs.get_collections()
+    assert oa.get_actions('products/PRD-000') == openapi_specs.get_actions('products/PRD-000')
+    assert oa.get_nested_collections(
+        'products/PRD-000',
+    ) == openapi_specs.get_nested_collections('products/PRD-000')
+    assert oa.exists('post', 'products/PRD-000/versions') == openapi_specs.exists(
+        'post', 'products/PRD-000/versions',
+    )
+
+
+def test_compile_specs_module(tmp_path, openapi_specs):
+    destination = tmp_path / 'specs.json'
+
+    subprocess.run(
+        [sys.executable, '-m', 'connect.client.openapi', 'tests/data/specs.yml', str(destination)],
+        check=True,
+    )
+
+    assert OpenAPISpecs(str(destination)).get_collections() == openapi_specs.get_collections()
+
+
+def test_compile_specs_cli_usage(capsys):
+    with pytest.raises(SystemExit) as cv:
+        main(['tests/data/specs.yml'])
+
+    assert cv.value.code == 2
+    assert 'destination' in capsys.readouterr().err
+
+
+def test_registry_get():
+    registry = SpecsRegistry()
+
+    specs = registry.get('tests/data/specs.yml')
+
+    assert isinstance(specs, OpenAPISpecs)
+    assert registry.get('tests/data/specs.yml') is specs
+
+
+def test_registry_get_load_once(mocker):
+    mocked_specs = mocker.patch('connect.client.openapi.OpenAPISpecs')
+    registry = SpecsRegistry()
+    cache = mocker.MagicMock()
+
+    registry.get('https://localhost/specs.yml', cache=cache)
+    registry.get('https://localhost/specs.yml', cache=cache)
+    registry.get('https://localhost/other.yml')
+
+    assert mocked_specs.call_count == 2
+    mocked_specs.assert_any_call('https://localhost/specs.yml', cache=cache, lean=False)
+    mocked_specs.assert_any_call('https://localhost/other.yml', cache=None, lean=False)
+
+
+def test_registry_get_concurrent(mocker):
+    mocked_specs = mocker.patch('connect.client.openapi.OpenAPISpecs')
+    registry = SpecsRegistry()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda _: registry.get('tests/data/specs.yml'), range(32)),
+        )
+
+    assert mocked_specs.call_count == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_registry_refresh():
+    registry = SpecsRegistry()
+    specs = registry.get('tests/data/specs.yml')
+
+    refreshed = registry.refresh('tests/data/specs.yml')
+
+    assert refreshed is not specs
+    assert registry.get('tests/data/specs.yml') is refreshed
+
+
+def test_registry_clear():
+    registry = SpecsRegistry()
+    specs = registry.get('tests/data/specs.yml')
+
+    registry.clear()
+
+    assert registry.get('tests/data/specs.yml') is not specs
+
+
+def test_registry_submit():
+    registry = SpecsRegistry()
+
+    future = registry.submit('tests/data/specs.yml')
+    specs = future.result(timeout=10)
+
+    assert isinstance(specs, OpenAPISpecs)
+    assert registry.get('tests/data/specs.yml') is specs
+    assert registry.submit('tests/data/specs.yml').result() is specs
+
+
+def test_registry_submit_shared(mocker):
+    event = threading.Event()
+
+    def _load(*args, **kwargs):
+        event.wait(10)
+        return mocker.MagicMock()
+
+    mocked_specs = mocker.patch('connect.client.openapi.OpenAPISpecs', side_effect=_load)
+    registry = SpecsRegistry()
+
+    f1 = registry.submit('https://localhost/specs.yml')
+    f2 = registry.submit('https://localhost/specs.yml')
+    event.set()
+
+    assert f1 is f2
+    assert f1.result(timeout=10) is registry.get('https://localhost/specs.yml')
+    assert mocked_specs.call_count == 1
+
+
+def test_registry_submit_error(mocker):
+    mocker.patch('connect.client.openapi.OpenAPISpecs', side_effect=[ValueError('boom'), 'specs'])
+    registry = SpecsRegistry()
+
+    with pytest.raises(ValueError):
+        registry.submit('https://localhost/specs.yml').result(timeout=10)
+
+    assert registry.submit('https://localhost/specs.yml').result(timeout=10) == 'specs'
+
+
+def test_lean_specs():
+    specs = {
+        'openapi': '3.0.0',
+        'info': {'title': 'Connect', 'description': 'Long description', 'version': '1.0'},
+        'tags': [{'name': 'Products'}],
+        'components': {'schemas': {}},
+        'paths': {
+            '/products': {
+                'summary': 'Products',
+                'description': 'Long description',
+                'get': {
+                    'operationId': 'products_list',
+                    'summary': 'List',
+                    'parameters': [{'name': 'id'}],
+                    'responses': {'200': {}},
+                },
+            },
+        },
+    }
+
+    assert lean_specs(specs) == {
+        'openapi': '3.0.0',
+        'info': {'title': 'Connect', 'version': '1.0'},
+        'tags': [{'name': 'Products'}],
+        'paths': {
+            '/products': {
+                'summary': 'Products',
+                'get': {'operationId': 'products_list'},
+            },
+        },
+    }
+
+
+def test_lean_mode(mocker, openapi_specs):
+    load = mocker.spy(OpenAPISpecs, '_load')
+    oa = OpenAPISpecs('tests/data/specs.yml', lean=True)
+
+    assert 'components' not in oa._specs
+    assert oa.title == openapi_specs.title
+    assert oa.version == openapi_specs.version
+    assert oa.tags == openapi_specs.tags
+    assert oa.exists('get', 'products/PRD-000') is True
+    assert oa.exists('post', 'products/PRD-000') is False
+    assert oa.get_namespaces() == openapi_specs.get_namespaces()
+    assert oa.get_collections() == openapi_specs.get_collections()
+    assert oa.get_actions('products/PRD-000') == openapi_specs.get_actions('products/PRD-000')
+    assert oa.get_nested_collections(
+        'products/PRD-000',
+    ) == openapi_specs.get_nested_collections('products/PRD-000')
+    assert load.call_count == 1
+
+    assert oa.description == openapi_specs.description
+    assert oa.get_collection('products') == openapi_specs.get_collection('products')
+    assert oa.get_resource('products/PRD-000') == openapi_specs.get_resource('products/PRD-000')
+    assert oa.get_collection('products') == openapi_specs.get_collection('products')
+    assert oa.get_action(
+        'products/PRD-000/endsale',
+    ) == openapi_specs.get_action('products/PRD-000/endsale')
+    assert load.call_count == 2
+    assert 'components' not in oa._specs
+    assert 'components' not in oa._help_sections
+
+
+def test_registry_lean():
+    registry = SpecsRegistry()
+
+    full = registry.get('tests/data/specs.yml')
+    lean = registry.get('tests/data/specs.yml', lean=True)
+
+    assert full is not lean
+    assert full._lean is False
+    assert lean._lean is True
+    assert registry.get('tests/data/specs.yml', lean=True) is lean
+
+
+def test_validate_request(openapi_specs):
+    assert openapi_specs.validate_request(
+        'post', 'products', {'name': 'Product', 'category': {'id': 'CAT-000'}},
+    ) == []
+    assert openapi_specs.validate_request('post', 'products', {'name': 1}) == [
+        '$.category: is required',
+        '$.name: must be of type string',
+    ]
+
+
+def test_validate_one_of(openapi_specs):
+    address = {
+        'address_line1': 'Street 1',
+        'city': 'City',
+        'state': 'State',
+        'postal_code': '00000',
+        'country': 'US',
+    }
+    phone = {'country_code': '+1', 'area_code': '555', 'phone_number': '0000', 'extension': '1'}
+    for structured_value in (address, dict(address, **phone)):
+        content = [
+            {
+                'id': 'PR-000',
+                'asset': {
+                    'id': 'AS-000',
+                    'params': [{'id': 'p', 'structured_value': structured_value}],
+                },
+            },
+        ]
+        assert openapi_specs.validate_response('get', 'requests', 200, content) == []
+
+    assert openapi_specs.validate_request(
+        'post', 'listing-requests', {'type': 'update', 'listing_id': 'LST-000'},
+    ) == []
+    assert openapi_specs.validate_request('post', 'listing-requests', {'type': 'unknown'}) == [
+        '$: must match exactly one schema of oneOf',
+    ]
+
+
+def test_validate_request_without_body(openapi_specs):
+    assert openapi_specs.validate_request('get', 'products', {'name': 1}) == []
+    assert openapi_specs.validate_request('patch', 'products', {'name': 1}) == []
+    assert openapi_specs.validate_request('post', 'unknown', {'name': 1}) == []
+
+
+def test_validate_response(openapi_specs):
+    assert openapi_specs.validate_response('get', 'products', 200, [{'id': 'PRD-000'}]) == []
+    assert openapi_specs.validate_response('get', 'products', 200, [{'id': 1}]) == [
+        '$[0].id: must be of type string',
+    ]
+    assert openapi_specs.validate_response('get', 'products', 302, {}) == []
+
+
+def test_validate_response_status_fallback():
+    specs = {
+        'paths': {
+            '/products': {
+                'get': {
+                    'responses': {
+                        '2XX': {
+                            'content': {'application/json': {'schema': {'type': 'array'}}},
+                        },
+                        'default': {'$ref': '#/components/responses/Error'},
+                    },
+                },
+            },
+        },
+        'components': {
+            'responses': {
+                'Error': {
+                    'content': {'application/json': {'schema': {'type': 'object'}}},
+                },
+            },
+        },
+    }
+    oa = OpenAPISpecs('specs.yml', specs=specs)
+
+    assert oa.validate_response('get', 'products', 200, {}) == ['$: must be of type array']
+    assert oa.validate_response('get', 'products', 400, []) == ['$: must be of type object']
+
+
+def test_validators_cached(mocker):
+    oa = OpenAPISpecs('tests/data/specs.yml')
+    compile_validator = mocker.spy(oa, '_compile_validator')
+
+    oa.validate_request('post', 'products', {})
+    oa.validate_request('post', 'products?limit=10', {})
+    oa.validate_request('put', 'products/PRD-000', {})
+
+    assert compile_validator.call_count == 2
+
+
+def test_validate_lean():
+    oa = OpenAPISpecs('tests/data/specs.yml', lean=True)
+
+    with pytest.raises(ValueError) as cv:
+        oa.validate_request('post', 'products', {'name': 'Product'})
+
+    assert str(cv.value) == 'Specifications loaded in lean mode cannot validate calls.'
+
+    with pytest.raises(ValueError):
+        oa.validate_response('get', 'products', 200, [])
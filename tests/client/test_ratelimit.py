@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from connect.client.ratelimit import RateLimiter
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_burst(mocker):
+    mocker.patch('connect.client.ratelimit.time.monotonic', return_value=100.0)
+    limiter = RateLimiter(2)
+
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.5
+    assert limiter.reserve() == 1.0
+
+
+def test_refill(mocker):
+    monotonic = mocker.patch('connect.client.ratelimit.time.monotonic', return_value=100.0)
+    limiter = RateLimiter(1, burst=1)
+
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 1.0
+
+    monotonic.return_value = 110.0
+
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 1.0
+
+
+def test_shared_between_threads(mocker):
+    mocker.patch('connect.client.ratelimit.time.monotonic', return_value=100.0)
+    limiter = RateLimiter(10)
+    delays = []
+
+    def _reserve():
+        for _ in range(10):
+            delays.append(limiter.reserve())
+
+    threads = [threading.Thread(target=_reserve) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(delays) == [0.0] * 10 + [(i + 1) / 10 for i in range(20)]
@@ -0,0 +1,176 @@
+import httpx
+
+import pytest
+
+import requests
+
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from connect.client.retry import DEFAULT_RETRY_EXCEPTIONS, RetryPolicy
+
+
+def test_no_retries_by_default(mocker):
+    state = RetryPolicy().start()
+
+    assert state.next_delay(response=mocker.MagicMock(status_code=502, headers={})) is None
+
+
+@pytest.mark.parametrize('status', (429, 500, 502, 503))
+def test_retry_statuses(mocker, status):
+    state = RetryPolicy(max_retries=1, jitter=False).start()
+
+    assert state.next_delay(response=mocker.MagicMock(status_code=status, headers={})) == 1.0
+    assert state.attempt == 1
+
+
+@pytest.mark.parametrize('status', (200, 204, 400, 404))
+def test_non_retryable_statuses(mocker, status):
+    state = RetryPolicy(max_retries=1).start()
+
+    assert state.next_delay(response=mocker.MagicMock(status_code=status, headers={})) is None
+
+
+def test_custom_statuses(mocker):
+    state = RetryPolicy(max_retries=1, statuses=(503,)).start()
+
+    assert state.next_delay(response=mocker.MagicMock(status_code=500, headers={})) is None
+    assert state.next_delay(response=mocker.MagicMock(status_code=503, headers={})) is not None
+
+
+@pytest.mark.parametrize(
+    'exception',
+    (
+        requests.ConnectionError(),
+        requests.Timeout(),
+        httpx.ConnectError('reset'),
+        httpx.ReadTimeout('timeout'),
+    ),
+)
+def test_retry_exceptions(exception):
+    state = RetryPolicy(max_retries=1).start()
+
+    assert state.next_delay(exception=exception) is not None
+
+
+def test_non_retryable_exception():
+    state = RetryPolicy(max_retries=1).start()
+
+    assert state.next_delay(exception=requests.TooManyRedirects()) is None
+
+
+def test_exponential_backoff(mocker):
+    response = mocker.MagicMock(status_code=500, headers={})
+    state = RetryPolicy(max_retries=5, backoff_factor=0.5, max_backoff=3, jitter=False).start()
+
+    delays = [state.next_delay(response=response) for _ in range(6)]
+
+    assert delays == [0.5, 1.0, 2.0, 3, 3, None]
+
+
+def test_jitter():
+    policy = RetryPolicy(backoff_factor=2)
+
+    for _ in range(20):
+        assert 2 <= policy.get_backoff(2) <= 4
+
+
+def test_retry_budget(mocker):
+    response = mocker.MagicMock(status_code=500, headers={})
+    state = RetryPolicy(max_retries=10, jitter=False, retry_budget=4).start()
+
+    assert state.next_delay(response=response) == 1.0
+    assert state.next_delay(response=response) == 2.0
+    assert state.next_delay(response=response) is None
+    assert state.waited == 3.0
+
+
+@pytest.mark.parametrize('value', ('7', '7.0'))
+def test_retry_after_seconds(mocker, value):
+    response = mocker.MagicMock(status_code=429, headers={'Retry-After': value})
+    state = RetryPolicy(max_retries=1).start()
+
+    assert state.next_delay(response=response) == 7.0
+
+
+def test_retry_after_date(mocker):
+    mocker.patch('connect.client.retry.time.time', return_value=1445412470.0)
+    response = mocker.MagicMock(
+        status_code=503,
+        headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+    )
+    state = RetryPolicy(max_retries=1).start()
+
+    assert state.next_delay(response=response) == 10.0
+
+
+def test_retry_after_invalid(mocker):
+    response = mocker.MagicMock(status_code=429, headers={'Retry-After': 'soon'})
+    state = RetryPolicy(max_retries=1, jitter=False).start()
+
+    assert state.next_delay(response=response) == 1.0
+
+
+def test_retry_after_ignored(mocker):
+    response = mocker.MagicMock(status_code=429, headers={'Retry-After': '30'})
+    state = RetryPolicy(max_retries=1, jitter=False, respect_retry_after=False).start()
+
+    assert state.next_delay(response=response) == 1.0
+
+
+def test_retry_after_exceeds_budget(mocker):
+    response = mocker.MagicMock(status_code=429, headers={'Retry-After': '30'})
+    state = RetryPolicy(max_retries=1, retry_budget=10).start()
+
+    assert state.next_delay(response=response) is None
+
+
+@pytest.mark.parametrize('method', ('get', 'GET', 'delete'))
+def test_retry_exceptions_idempotent_method(method):
+    state = RetryPolicy(max_retries=1).start(method)
+
+    assert state.next_delay(exception=requests.ReadTimeout()) is not None
+
+
+@pytest.mark.parametrize(
+    'exception',
+    (
+        requests.ReadTimeout(),
+        requests.ConnectionError('Connection aborted.'),
+        httpx.ReadTimeout('timeout'),
+        httpx.RemoteProtocolError('disconnected'),
+    ),
+)
+@pytest.mark.parametrize('method', ('post', 'put'))
+def test_no_retry_exceptions_non_idempotent_method(exception, method):
+    state = RetryPolicy(max_retries=1, exceptions=(*DEFAULT_RETRY_EXCEPTIONS, httpx.HTTPError))
+    state = state.start(method)
+
+    assert state.next_delay(exception=exception) is None
+
+
+@pytest.mark.parametrize(
+    'exception',
+    (
+        requests.ConnectTimeout(),
+        requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'refused'))),
+        httpx.ConnectError('refused'),
+        httpx.ConnectTimeout('timeout'),
+    ),
+)
+def test_retry_connect_errors_non_idempotent_method(exception):
+    state = RetryPolicy(max_retries=1).start('post')
+
+    assert state.next_delay(exception=exception) is not None
+
+
+def test_custom_idempotent_methods():
+    state = RetryPolicy(max_retries=1, idempotent_methods=('GET', 'PUT')).start('put')
+
+    assert state.next_delay(exception=requests.ReadTimeout()) is not None
+
+
+def test_retry_after_capped(mocker):
+    response = mocker.MagicMock(status_code=503, headers={'Retry-After': '86400'})
+    state = RetryPolicy(max_retries=1, max_backoff=30).start()
+
+    assert state.next_delay(response=response) == 30
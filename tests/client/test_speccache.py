@@ -0,0 +1,77 @@
+import os
+
+from connect.client.speccache import SpecsCache
+
+
+def test_get_missing(tmp_path):
+    cache = SpecsCache(str(tmp_path))
+    assert cache.get('https://localhost/specs.yml') is None
+
+
+def test_get_corrupted(tmp_path):
+    cache = SpecsCache(str(tmp_path))
+    with open(cache._get_filename('https://localhost/specs.yml'), 'w') as f:
+        f.write('{not json')
+
+    assert cache.get('https://localhost/specs.yml') is None
+
+
+def test_set_get(tmp_path):
+    cache = SpecsCache(str(tmp_path / 'specs'))
+    cache.set('https://localhost/specs.yml', {'paths': {}}, etag='"v1"')
+
+    entry = cache.get('https://localhost/specs.yml')
+    assert entry['specs'] == {'paths': {}}
+    assert entry['etag'] == '"v1"'
+    assert entry['last_modified'] is None
+    assert cache.is_fresh(entry) is True
+    assert cache.get('https://localhost/other.yml') is None
+
+
+def test_is_fresh(tmp_path, mocker):
+    mocker.patch('connect.client.speccache.time.time', return_value=1000.0)
+    cache = SpecsCache(str(tmp_path), ttl=60)
+
+    assert cache.is_fresh({'fetched_at': 950.0}) is True
+    assert cache.is_fresh({'fetched_at': 900.0}) is False
+
+
+def test_touch(tmp_path, mocker):
+    cache = SpecsCache(str(tmp_path))
+    entry = cache.set('https://localhost/specs.yml', {'paths': {}})
+    mocker.patch('connect.client.speccache.time.time', return_value=entry['fetched_at'] + 10)
+
+    cache.touch('https://localhost/specs.yml', entry)
+
+    assert cache.get('https://localhost/specs.yml')['fetched_at'] == entry['fetched_at']
+
+
+def test_get_validators(tmp_path):
+    cache = SpecsCache(str(tmp_path))
+
+    assert cache.get_validators({}) == {}
+    assert cache.get_validators(
+        {'etag': '"v1"', 'last_modified': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+    ) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+    }
+
+
+def test_set_write_error(tmp_path):
+    path = tmp_path / 'file'
+    path.write_text('')
+    cache = SpecsCache(str(path))
+
+    cache.set('https://localhost/specs.yml', {'paths': {}})
+
+    assert cache.get('https://localhost/specs.yml') is None
+
+
+def test_set_not_serializable(tmp_path):
+    cache = SpecsCache(str(tmp_path))
+
+    cache.set('https://localhost/specs.yml', {'paths': {1: object()}, 'x': {(1, 2): 1}})
+
+    assert cache.get('https://localhost/specs.yml') is None
+    assert os.listdir(str(tmp_path)) == []
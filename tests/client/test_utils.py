@@ -1,8 +1,13 @@
+import json
 import platform
+from json import JSONDecodeError
+
+import pytest
 
 from connect.client.utils import (
     ContentRange,
     get_headers,
+    iter_json_array,
     parse_content_range,
     resolve_attribute,
 )
@@ -64,3 +69,67 @@ def test_resolve_attribute_not_found():
     }
 
     assert resolve_attribute('a.b.c', data) is None
+
+
+@pytest.mark.parametrize('chunk_size', (1, 3, 7, 64, 4096))
+def test_iter_json_array(chunk_size):
+    items = [
+        {'id': i, 'name': 'ñ' * i, 'nested': [1, {'text': '],{'}]}
+        for i in range(20)
+    ] + [1, 2.5, -1e5, True, None, 'text']
+    data = json.dumps(items, indent=2).encode('utf-8')
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    assert list(iter_json_array(chunks)) == items
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array([b' [', b' ] '])) == []
+
+
+def test_iter_json_array_is_lazy():
+    def _chunks():
+        yield b'[{"id": 1}, {"id": 2}'
+        raise AssertionError('should not be read')
+
+    assert next(iter_json_array(_chunks())) == {'id': 1}
+
+
+@pytest.mark.parametrize(
+    'data',
+    (b'{"id": 1}', b'[1, 2', b'[1 2]', b'[1,,2]', b'[,1]', b'[1,]', b'[,]', b'[ , ]'),
+)
+def test_iter_json_array_invalid(data):
+    with pytest.raises(JSONDecodeError):
+        list(iter_json_array([data]))
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2))
+def test_iter_json_array_consecutive_commas(chunk_size):
+    data = b'[1, ,2]'
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    items = iter_json_array(chunks)
+
+    assert next(items) == 1
+    with pytest.raises(JSONDecodeError) as cv:
+        next(items)
+
+    assert cv.value.msg == 'Expecting value'
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 5))
+def test_iter_json_array_escapes(chunk_size):
+    items = [{'text': 'a\\"b],{'}, '\\', '"', {'path': 'C:\\\\dir\\\\'}]
+    data = json.dumps(items).encode('utf-8')
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    assert list(iter_json_array(chunks)) == items
+
+
+def test_iter_json_array_large_item_is_decoded_once(mocker):
+    decode = mocker.spy(json.JSONDecoder, 'decode')
+    data = json.dumps([{'text': 'x' * 10000}, 1]).encode('utf-8')
+    chunks = [data[i:i + 10] for i in range(0, len(data), 10)]
+
+    assert list(iter_json_array(chunks)) == [{'text': 'x' * 10000}, 1]
+    assert decode.call_count == 2
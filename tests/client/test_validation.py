@@ -0,0 +1,214 @@
+import pytest
+
+from connect.client.validation import SchemaCompiler
+
+
+SPECS = {
+    'components': {
+        'schemas': {
+            'Node': {
+                'type': 'object',
+                'required': ['name'],
+                'properties': {
+                    'name': {'type': 'string'},
+                    'children': {'type': 'array', 'items': {'$ref': '#/components/schemas/Node'}},
+                },
+            },
+            'a/b': {'type': 'integer'},
+        },
+    },
+}
+
+
+def _validate(schema, value, direction='request'):
+    return SchemaCompiler(SPECS, direction).compile(schema)(value)
+
+
+@pytest.mark.parametrize(
+    ('schema_type', 'valid', 'invalid'),
+    (
+        ('string', 'a', 1),
+        ('integer', 1, 1.5),
+        ('integer', 1, True),
+        ('integer', 1.0, float('inf')),
+        ('integer', -2.0, float('nan')),
+        ('number', 1.0, True),
+        ('number', 1.5, '1'),
+        ('boolean', False, 0),
+        ('array', [1], {}),
+        ('object', {}, []),
+    ),
+)
+def test_types(schema_type, valid, invalid):
+    assert _validate({'type': schema_type}, valid) == []
+    assert _validate({'type': schema_type}, invalid) == [f'$: must be of type {schema_type}']
+
+
+def test_nullable():
+    assert _validate({'type': 'string'}, None) == ['$: must not be null']
+    assert _validate({'type': 'string', 'nullable': True}, None) == []
+    assert _validate({}, None) == []
+
+
+def test_enum():
+    assert _validate({'type': 'string', 'enum': ['a', 'b']}, 'a') == []
+    assert _validate({'type': 'string', 'enum': ['a', 'b']}, 'c') == [
+        "$: must be one of ['a', 'b']",
+    ]
+
+
+def test_string():
+    schema = {'type': 'string', 'minLength': 2, 'maxLength': 3, 'pattern': '^[a-z]+$'}
+
+    assert _validate(schema, 'ab') == []
+    assert _validate(schema, 'a') == ['$: must be at least 2 characters long']
+    assert _validate(schema, 'abcd') == ['$: must be at most 3 characters long']
+    assert _validate(schema, 'A1') == ['$: must match ^[a-z]+$']
+
+
+def test_number():
+    schema = {'type': 'number', 'minimum': 1, 'maximum': 10}
+    exclusive = dict(schema, exclusiveMinimum=True, exclusiveMaximum=True)
+
+    assert _validate(schema, 1) == []
+    assert _validate(schema, 10) == []
+    assert _validate(schema, 0) == ['$: must be >= 1']
+    assert _validate(schema, 11) == ['$: must be <= 10']
+    assert _validate(exclusive, 1) == ['$: must be > 1']
+    assert _validate(exclusive, 10) == ['$: must be < 10']
+
+
+def test_array():
+    schema = {'type': 'array', 'minItems': 1, 'maxItems': 2, 'items': {'type': 'integer'}}
+
+    assert _validate(schema, [1, 2]) == []
+    assert _validate(schema, []) == ['$: must contain at least 1 items']
+    assert _validate(schema, [1, 2, 3]) == ['$: must contain at most 2 items']
+    assert _validate(schema, [1, 'a']) == ['$[1]: must be of type integer']
+
+
+def test_object():
+    schema = {
+        'type': 'object',
+        'required': ['id', 'name', 'password'],
+        'properties': {
+            'id': {'type': 'string', 'readOnly': True},
+            'name': {'type': 'string'},
+            'password': {'type': 'string', 'writeOnly': True},
+        },
+    }
+
+    assert _validate(schema, {'name': 'a', 'password': 'b'}) == []
+    assert _validate(schema, {'name': 1}) == [
+        '$.password: is required',
+        '$.name: must be of type string',
+    ]
+    assert _validate(schema, {'id': 'a', 'name': 'b'}, direction='response') == []
+    assert _validate(schema, {'name': 'b'}, direction='response') == ['$.id: is required']
+
+
+def test_additional_properties():
+    schema = {'type': 'object', 'properties': {'a': {}}, 'additionalProperties': False}
+
+    assert _validate(schema, {'a': 1}) == []
+    assert _validate(schema, {'a': 1, 'b': 2}) == ['$.b: is not allowed']
+    assert _validate(
+        {'type': 'object', 'additionalProperties': {'type': 'integer'}},
+        {'a': 1, 'b': 'c'},
+    ) == ['$.b: must be of type integer']
+
+
+def test_combinators():
+    all_of = {'allOf': [{'type': 'string'}, {'minLength': 2}]}
+    any_of = {'anyOf': [{'type': 'string'}, {'type': 'integer'}]}
+    one_of = {'oneOf': [{'type': 'number'}, {'type': 'integer'}]}
+
+    assert _validate(all_of, 'ab') == []
+    assert _validate(all_of, 'a') == ['$: must be at least 2 characters long']
+    assert _validate(any_of, 1) == []
+    assert _validate(any_of, 1.5) == ['$: must match at least one schema of anyOf']
+    assert _validate(one_of, 1.5) == []
+    assert _validate(one_of, 1) == ['$: must match exactly one schema of oneOf']
+    assert _validate(one_of, 'a') == ['$: must match exactly one schema of oneOf']
+
+
+def test_one_of_open_schemas():
+    open_schemas = {
+        'oneOf': [
+            {'type': 'object', 'required': ['a']},
+            {'type': 'object', 'required': ['b']},
+        ],
+    }
+    closed_schemas = {
+        'oneOf': [
+            dict(sub, properties={'a': {}, 'b': {}}, additionalProperties=False)
+            for sub in open_schemas['oneOf']
+        ],
+    }
+
+    assert _validate(open_schemas, {'a': 1, 'b': 2}) == []
+    assert _validate(open_schemas, {'c': 1}) == ['$: must match exactly one schema of oneOf']
+    assert _validate(closed_schemas, {'a': 1}) == []
+    assert _validate(closed_schemas, {'a': 1, 'b': 2}) == [
+        '$: must match exactly one schema of oneOf',
+    ]
+
+
+def test_discriminator():
+    schema = {
+        'oneOf': [
+            {'$ref': '#/components/schemas/Cat'},
+            {'$ref': '#/components/schemas/Dog'},
+        ],
+        'discriminator': {'propertyName': 'kind'},
+    }
+    specs = {
+        'components': {
+            'schemas': {
+                'Cat': {'type': 'object', 'properties': {'kind': {}, 'lives': {'type': 'integer'}}},
+                'Dog': {'type': 'object', 'properties': {'kind': {}, 'barks': {'type': 'boolean'}}},
+            },
+        },
+    }
+    validate = SchemaCompiler(specs, 'request').compile(schema)
+    mapped = SchemaCompiler(specs, 'request').compile(
+        dict(schema, discriminator={'propertyName': 'kind', 'mapping': {'cat': 'Cat'}}),
+    )
+
+    assert validate({'kind': 'Cat', 'lives': 9}) == []
+    assert validate({'kind': 'Cat', 'lives': 'nine'}) == [
+        '$: must match exactly one schema of oneOf',
+    ]
+    assert validate({'kind': 'Cow'}) == ['$: must match exactly one schema of oneOf']
+    assert mapped({'kind': 'cat', 'lives': 9}) == []
+    assert mapped({'kind': 'Dog'}) == ['$: must match exactly one schema of oneOf']
+
+
+def test_recursive_ref():
+    schema = {'$ref': '#/components/schemas/Node'}
+
+    assert _validate(schema, {'name': 'a', 'children': [{'name': 'b', 'children': []}]}) == []
+    assert _validate(schema, {'name': 'a', 'children': [{'children': [{'name': 1}]}]}) == [
+        '$.children[0].name: is required',
+        '$.children[0].children[0].name: must be of type string',
+    ]
+
+
+def test_ref_escaping():
+    assert _validate({'$ref': '#/components/schemas/a~1b'}, 'a') == [
+        '$: must be of type integer',
+    ]
+
+
+def test_compile_shares_refs():
+    compiler = SchemaCompiler(SPECS, 'request')
+    compiler.compile({'$ref': '#/components/schemas/Node'})
+
+    assert list(compiler._refs) == ['#/components/schemas/Node']
+
+
+def test_unsupported_ref():
+    with pytest.raises(ValueError) as cv:
+        _validate({'$ref': 'other.yml#/Node'}, {})
+
+    assert str(cv.value) == 'Unsupported reference `other.yml#/Node`.'
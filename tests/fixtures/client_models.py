@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from connect.client.models import (
@@ -140,9 +142,11 @@ def async_action_factory(async_client_mock):
 
 @pytest.fixture
 def rs_factory(mocker):
+    executor = ThreadPoolExecutor(max_workers=10)
     client = mocker.MagicMock()
     client._endpoint = 'https://example.com/api/v1'
     client.default_limit = None
+    client.submit = executor.submit
 
     def _rs_factory(
         client=client,
@@ -151,7 +155,8 @@ def rs_factory(mocker):
     ):
         rs = ResourceSet(client, path, query)
         return rs
-    return _rs_factory
+    yield _rs_factory
+    executor.shutdown()
 
 
 @pytest.fixture
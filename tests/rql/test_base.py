@@ -319,3 +319,108 @@ def test_hash():
     s.add(r)
 
     assert len(s) == 1
+
+
+def test_str_cached():
+    q = RQLQuery(id='ID') & RQLQuery(field='value')
+    assert str(q) == 'and(eq(id,ID),eq(field,value))'
+    assert q._str is not None
+    assert q.children[0]._str is not None
+    assert str(q) == 'and(eq(id,ID),eq(field,value))'
+
+
+def test_str_cache_invalidated_on_mutation():
+    q = RQLQuery().id
+    q.eq('ID')
+    assert str(q) == 'eq(id,ID)'
+    q.ne('ID')
+    assert str(q) == 'ne(id,ID)'
+
+
+def test_str_cache_invalidated_on_child_mutation():
+    child = RQLQuery().id
+    child.eq('ID')
+    q = RQLQuery(field='value') | child
+    assert str(q) == 'or(eq(field,value),eq(id,ID))'
+    child.ne('ID')
+    assert str(q) == 'or(eq(field,value),ne(id,ID))'
+
+
+def test_str_cache_invalidated_on_append():
+    q = RQLQuery(id='ID', field='value')
+    other = RQLQuery(id='ID') | RQLQuery(field='value')
+    assert str(q) == 'and(eq(id,ID),eq(field,value))'
+    q &= other
+    assert str(q) == 'and(eq(id,ID),eq(field,value),or(eq(id,ID),eq(field,value)))'
+
+
+def test_str_deeply_nested():
+    q = RQLQuery(id='ID')
+    for idx in range(5000):
+        q = (q | RQLQuery(a=str(idx))) & RQLQuery(b=str(idx))
+    expected = 'eq(id,ID)'
+    for idx in range(5000):
+        expected = f'and(or({expected},eq(a,{idx})),eq(b,{idx}))'
+    assert str(q) == expected
+
+
+def test_str_wide():
+    q = RQLQuery()
+    for idx in range(1000):
+        q &= RQLQuery(field=str(idx))
+    assert str(q) == f'and({",".join(f"eq(field,{idx})" for idx in range(1000))})'
+
+
+def test_hash_equal_queries():
+    r1 = RQLQuery(id='ID') | (RQLQuery(field='value') & RQLQuery(other='value'))
+    r2 = RQLQuery(id='ID') | (RQLQuery(field='value') & RQLQuery(other='value'))
+    assert r1 == r2
+    assert hash(r1) == hash(r2)
+    assert r1 != RQLQuery(id='ID') | RQLQuery(field='value')
+
+
+def test_hash_invalidated_on_child_mutation():
+    child = RQLQuery().id
+    child.eq('ID')
+    q = RQLQuery(field='value') | child
+    before = hash(q)
+    child.ne('ID')
+    assert hash(q) != before
+    assert hash(q) == hash(RQLQuery(field='value') | RQLQuery().id.ne('ID'))
+
+
+def test_hash_deeply_nested():
+    q = RQLQuery(id='ID')
+    for idx in range(5000):
+        q = (q | RQLQuery(a=str(idx))) & RQLQuery(b=str(idx))
+    assert isinstance(hash(q), int)
+
+
+def test_append_skips_duplicates():
+    q = RQLQuery(id='ID')
+    for _ in range(3):
+        q = q | RQLQuery(field='value')
+    assert str(q) == 'or(eq(id,ID),eq(field,value))'
+
+
+def test_any_of():
+    q = RQLQuery.any_of(RQLQuery(id=f'ID-{idx}') for idx in range(3))
+    assert q.op == RQLQuery.OR
+    assert str(q) == 'or(eq(id,ID-0),eq(id,ID-1),eq(id,ID-2))'
+    assert q == RQLQuery(id='ID-0') | RQLQuery(id='ID-1') | RQLQuery(id='ID-2')
+
+
+def test_all_of():
+    q = RQLQuery.all_of([RQLQuery(id='ID'), RQLQuery(field='value'), RQLQuery(id='ID')])
+    assert q.op == RQLQuery.AND
+    assert str(q) == 'and(eq(id,ID),eq(field,value))'
+
+
+def test_any_of_single():
+    r = RQLQuery(id='ID')
+    assert RQLQuery.any_of([r, RQLQuery()]) is r
+
+
+def test_any_of_empty():
+    assert str(RQLQuery.all_of([])) == ''
+    assert not RQLQuery.any_of([])
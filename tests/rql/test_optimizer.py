@@ -0,0 +1,86 @@
+import pytest
+
+from connect.client.rql import R
+
+
+@pytest.mark.parametrize(
+    ('query', 'expected'),
+    (
+        (R(), ''),
+        (R(id='ID'), 'eq(id,ID)'),
+        (~R(id='ID'), 'not(eq(id,ID))'),
+        (~~R(id='ID'), 'eq(id,ID)'),
+        (~~~R(id='ID'), 'not(eq(id,ID))'),
+        (
+            R(_op=R.AND, _children=[R(_op=R.AND, _children=[R(a='1'), R(b='2')])]),
+            'and(eq(a,1),eq(b,2))',
+        ),
+        (
+            (R(a='1') & R(b='2')) & (R(c='3') & R(a='1')),
+            'and(eq(a,1),eq(b,2),eq(c,3))',
+        ),
+        (~~(R(a='1') | R(b='2')), 'or(eq(a,1),eq(b,2))'),
+        (R(_expr='eq(a,1)', _negated=True) | R(b='2'), 'or(not(eq(a,1)),eq(b,2))'),
+        (R(a='1') | R(b='2') | R(a='3'), 'or(in(a,(1,3)),eq(b,2))'),
+        (R(a='1') | R(a__in=['1', '2']), 'in(a,(1,2))'),
+        (
+            R(a__in=['1', '2', '3']) & R(a__in=['2', '3', '4']),
+            'and(in(a,(1,2,3)),in(a,(2,3,4)))',
+        ),
+        (R(a='1') & R(a='1.0'), 'and(eq(a,1),eq(a,1.0))'),
+        (R().tags.id.eq('A') & R().tags.id.eq('B'), 'and(eq(tags.id,A),eq(tags.id,B))'),
+        (
+            R(status='active') & (R(id='PR-1') | R(id='PR-2')),
+            'and(eq(status,active),in(id,(PR-1,PR-2)))',
+        ),
+        (R(a='1') | (R(a='1') & ~R(a='1')), 'eq(a,1)'),
+        (~(R(a='1') & ~R(a='1')), ''),
+        (R(a__ilike='*a,b*') | R(a__ilike='*c*'), 'or(ilike(a,*a,b*),ilike(a,*c*))'),
+        (~R(id__in=[]), ''),
+        (~R(id__in=[]) | R(b='2'), ''),
+        (~R(id__in=[]) & R(b='2'), 'eq(b,2)'),
+        (R(a='1') & (R(b='1') | ~R(id__in=[])), 'eq(a,1)'),
+        (R(b='1') | (~R(id__in=[]) & ~R(c__in=[])), ''),
+        (R(b='1') | (R() & R()), 'eq(b,1)'),
+    ),
+)
+def test_optimize(query, expected):
+    assert str(query.optimize()) == expected
+
+
+@pytest.mark.parametrize(
+    'query',
+    (
+        R(a__in=[]),
+        R(a='1') & ~R(a='1'),
+        ~~R(a='1') & ~R(a='1'),
+        R(b='2') & R(a__in=[]),
+        R(b='2') & ((R(a='1') & ~R(a='1')) | R(a__in=[])),
+        ~(~R(id__in=[]) | R(b='2')),
+        R(b='2') & ~(R(a='1') | ~R(id__in=[])),
+    ),
+)
+def test_optimize_matches_nothing(query):
+    assert query.optimize() is None
+
+
+def test_optimize_does_not_modify_query():
+    query = R(a='1') | R(a='2')
+    query.optimize()
+    assert str(query) == 'or(eq(a,1),eq(a,2))'
+
+
+def test_optimize_cache_invalidated():
+    child = R().a
+    child.eq('1')
+    query = R(a='2') | child
+    assert str(query.optimize()) == 'in(a,(2,1))'
+    child.eq('3')
+    assert str(query.optimize()) == 'in(a,(2,3))'
+
+
+def test_optimize_deeply_nested():
+    query = R(id='ID')
+    for idx in range(5000):
+        query = (query | R(a=str(idx))) & R(b=str(idx))
+    assert str(query.optimize()).startswith('and(or(and(or(')